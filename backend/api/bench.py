@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Load and latency benchmark for the Portfolio API.
+
+Drives every route either in-process (ASGI, no sockets) or against a local
+uvicorn it starts itself, at several concurrency levels, and reports
+requests/sec plus p50/p95/p99 latency per route. Runs fully offline: state
+goes to a throwaway directory, per-IP rate limits and the per-route
+concurrency gates are switched off (--gates keeps the gates on), and every
+AI request carries unique text so the result cache doesn't flatter the
+numbers. Requests the server sheds (429/503 with Retry-After) are counted
+in their own column, apart from errors and latency percentiles.
+
+  python bench.py                                  # in-process, all routes
+  python bench.py --target uvicorn --concurrency 1,16,64
+  python bench.py --routes ai.,contact. --requests 100
+  python bench.py --save baseline.json             # record a baseline
+  python bench.py --compare baseline.json          # exit 1 on regression
+  python bench.py --gates --routes ai.             # measure load shedding
+
+Requires httpx (pip install httpx) in addition to requirements.txt.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+import httpx
+
+# ── Config ──
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONCURRENCY = "1,8,32"
+DEFAULT_REQUESTS = 200
+WARMUP_REQUESTS = 10
+DEFAULT_THRESHOLD = 0.25
+UVICORN_BOOT_TIMEOUT = 30
+
+WORDS = (
+    "server latency cache request python network kernel memory thread queue "
+    "deploy metrics sqlite index search summary keyword analysis stream socket "
+    "good great poor slow fast reliable broken stable modern simple"
+).split()
+
+
+# ── Workload ──
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    path: str
+    build: Callable[[int], dict] = lambda i: {}
+
+
+def _sentences(i: int, count: int) -> str:
+    rng = random.Random(i)
+    return " ".join(
+        f"Request {i} sentence {n} is about " + " ".join(rng.choices(WORDS, k=10)) + "."
+        for n in range(count)
+    )
+
+
+def _raw(size: int) -> Callable[[int], dict]:
+    def build(i: int) -> dict:
+        return {"content": random.Random(i).randbytes(size)}
+    return build
+
+
+ROUTES = [
+    Route("system.health", "GET", "/api/v1/system/health"),
+    Route("system.metrics", "GET", "/api/v1/system/metrics"),
+    Route("ai.sentiment", "POST", "/api/v1/ai/sentiment", lambda i: {"json": {"text": _sentences(i, 3)}}),
+    Route("ai.keywords", "POST", "/api/v1/ai/keywords", lambda i: {"json": {"text": _sentences(i, 6)}}),
+    Route("ai.summarize", "POST", "/api/v1/ai/summarize", lambda i: {"json": {"text": _sentences(i, 12)}}),
+    Route("playground.hash", "POST", "/api/v1/playground/hash",
+          lambda i: {"json": {"text": f"benchmark payload {i}", "algorithm": "sha256"}}),
+    Route("playground.hash-stream", "POST", "/api/v1/playground/hash/stream", _raw(64 * 1024)),
+    Route("playground.base64", "POST", "/api/v1/playground/base64",
+          lambda i: {"json": {"text": f"benchmark payload {i}" * 20, "action": "encode"}}),
+    Route("playground.base64-stream", "POST", "/api/v1/playground/base64/stream?action=encode", _raw(64 * 1024)),
+    Route("playground.headers", "GET", "/api/v1/playground/headers"),
+    Route("playground.ip", "GET", "/api/v1/playground/ip"),
+    Route("playground.json-to-csv", "POST", "/api/v1/playground/json-to-csv",
+          lambda i: {"json": {"data": [{"id": i * 100 + n, "name": f"row {n}", "ok": n % 2 == 0} for n in range(50)]}}),
+    Route("playground.json-to-csv-stream", "POST", "/api/v1/playground/json-to-csv/stream",
+          lambda i: {"content": "\n".join(json.dumps({"id": i * 1000 + n, "v": n * 0.5}) for n in range(1000)).encode()}),
+    Route("playground.regex", "POST", "/api/v1/playground/regex-test",
+          lambda i: {"params": {"pattern": r"(\w+)@(\w+)\.com", "text": f"user{i}@example.com other{i}@test.com"}}),
+    Route("contact.insert", "POST", "/api/v1/contact",
+          lambda i: {"json": {"name": f"Bench {i}", "email": f"bench{i}@example.com", "message": _sentences(i, 2)}}),
+    Route("contact.list", "GET", "/api/v1/contact/messages", lambda i: {"params": {"limit": 20}}),
+]
+
+
+def _isolated_env(state_dir: str, gates: bool) -> dict:
+    """Point every on-disk store at state_dir and disable rate limits (and gates unless asked)."""
+    return {
+        "ADMISSION_GATES_ENABLED": "1" if gates else "0",
+        "DB_PATH": os.path.join(state_dir, "contact_messages.db"),
+        "AI_CACHE_DB": "",
+        "KEYWORD_INDEX_PATH": "",
+        "RATE_LIMITS_ENABLED": "0",
+        "SHARED_STATE_PATH": os.path.join(state_dir, "shared.state"),
+    }
+
+
+# ── Measurement ──
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def run_level(client: httpx.AsyncClient, route: Route, concurrency: int, total: int, seed: int) -> dict:
+    """Issue `total` requests with `concurrency` workers; returns latency stats in ms."""
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    shed = 0
+    counter = iter(range(total))
+    # Build payloads up front so generation cost isn't timed.
+    payloads = [route.build(seed + i) for i in range(total)]
+
+    async def worker():
+        nonlocal shed
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                resp = await client.request(route.method, route.path, **payloads[i])
+                await resp.aread()
+                if resp.status_code in (429, 503) and "retry-after" in resp.headers:
+                    shed += 1
+                    continue
+                outcome = None if resp.status_code < 400 else str(resp.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            if outcome is None:
+                latencies.append(elapsed)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "shed": shed,
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+    }
+
+
+async def run_suite(client: httpx.AsyncClient, routes: list[Route], levels: list[int], total: int) -> dict:
+    results = {}
+    seed = 0
+    for route in routes:
+        # Warm-up: first-call costs (worker spawn, statement cache) aren't steady state.
+        await run_level(client, route, 1, WARMUP_REQUESTS, seed)
+        seed += WARMUP_REQUESTS
+        for concurrency in levels:
+            stats = await run_level(client, route, concurrency, total, seed)
+            seed += total
+            results[f"{route.name}@{concurrency}"] = stats
+            err = sum(stats["errors"].values())
+            print(
+                f"{route.name:<32} c={concurrency:<4} {stats['rps']:>9.1f} rps  "
+                f"p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f} ms"
+                + (f"  shed {stats['shed']}" if stats["shed"] else "")
+                + (f"  errors {err} {stats['errors']}" if err else ""),
+                flush=True,
+            )
+    return results
+
+
+# ── Targets ──
+
+async def bench_in_process(routes: list[Route], levels: list[int], total: int, state_dir: str, gates: bool) -> dict:
+    os.environ.update(_isolated_env(state_dir, gates))
+    sys.path.insert(0, HERE)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_suite(client, routes, levels, total)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def bench_uvicorn(
+    routes: list[Route], levels: list[int], total: int, state_dir: str, gates: bool, workers: int
+) -> dict:
+    port = _free_port()
+    env = {**os.environ, **_isolated_env(state_dir, gates)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=HERE, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + UVICORN_BOOT_TIMEOUT
+        async with httpx.AsyncClient(
+            base_url=base_url, timeout=60,
+            limits=httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels)),
+        ) as client:
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+                try:
+                    if (await client.get("/api/v1/system/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become healthy in time")
+                await asyncio.sleep(0.2)
+            return await run_suite(client, routes, levels, total)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ── Baselines ──
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions where p95 grew or throughput fell by more than `threshold`."""
+    problems = []
+    for key, base in baseline["results"].items():
+        current = results.get(key)
+        if current is None:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            problems.append(f"{key}: p95 {base['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - threshold):
+            problems.append(f"{key}: throughput {base['rps']:.1f} -> {current['rps']:.1f} rps")
+        base_errors = sum(base["errors"].values())
+        current_errors = sum(current["errors"].values())
+        if current_errors > base_errors + current["requests"] * threshold / 10:
+            problems.append(f"{key}: errors {base_errors} -> {current_errors}")
+        base_shed, current_shed = base.get("shed", 0), current["shed"]
+        if current_shed > base_shed + current["requests"] * threshold / 10:
+            problems.append(f"{key}: shed {base_shed} -> {current_shed}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Portfolio API route.")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn target only)")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="requests per route and level")
+    parser.add_argument("--routes", default="", help="comma-separated route name prefixes, e.g. ai.,contact.")
+    parser.add_argument("--save", metavar="FILE", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a baseline and fail on regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative regression (default 0.25)")
+    parser.add_argument("--gates", action="store_true", help="keep the per-route concurrency gates on")
+    parser.add_argument("--list", action="store_true", help="list route names and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for route in ROUTES:
+            print(f"{route.name:<32} {route.method:<5} {route.path}")
+        return
+
+    prefixes = [p for p in args.routes.split(",") if p]
+    routes = [r for r in ROUTES if not prefixes or r.name.startswith(tuple(prefixes))]
+    if not routes:
+        parser.error(f"no routes match {args.routes!r} (see --list)")
+    levels = sorted({int(c) for c in args.concurrency.split(",") if c})
+
+    print(f"target={args.target} levels={levels} requests={args.requests} routes={len(routes)}", flush=True)
+    with tempfile.TemporaryDirectory(prefix="portfolio-bench-") as state_dir:
+        if args.target == "uvicorn":
+            results = asyncio.run(bench_uvicorn(routes, levels, args.requests, state_dir, args.gates, args.workers))
+        else:
+            results = asyncio.run(bench_in_process(routes, levels, args.requests, state_dir, args.gates))
+
+    report = {
+        "meta": {
+            "target": args.target,
+            "workers": args.workers if args.target == "uvicorn" else None,
+            "gates": args.gates,
+            "requests_per_level": args.requests,
+            "concurrency": levels,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["target"] != args.target:
+            print(f"WARNING: baseline target is {baseline['meta']['target']}, this run is {args.target}")
+        if baseline["meta"].get("gates", True) != args.gates:
+            print("WARNING: baseline and this run differ in --gates; shed counts are not comparable")
+        problems = compare(results, baseline, args.threshold)
+        if problems:
+            print(f"\nFAIL: {len(problems)} regression(s) beyond {args.threshold:.0%}:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"\nOK: no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
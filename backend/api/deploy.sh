@@ -60,13 +60,11 @@ source "$APP_DIR/venv/bin/activate"
 pip install --quiet --upgrade pip
 pip install --quiet -r "$APP_DIR/requirements.txt"
 
-# Download NLTK data
+# Download NLTK data once into the app dir (the API never downloads at boot)
 python -c "
 import nltk
-nltk.download('punkt', quiet=True)
-nltk.download('punkt_tab', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('stopwords', quiet=True)
+for pkg in ('punkt', 'punkt_tab', 'averaged_perceptron_tagger', 'stopwords'):
+    nltk.download(pkg, download_dir='$APP_DIR/nltk_data', quiet=True)
 " 2>/dev/null || true
 
 deactivate
@@ -85,10 +83,11 @@ Type=exec
 User=${APP_USER}
 Group=${APP_USER}
 WorkingDirectory=${APP_DIR}
-ExecStart=${APP_DIR}/venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000 --workers 2
+ExecStart=${APP_DIR}/venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000 --workers 2 --timeout-graceful-shutdown 5
 Restart=always
 RestartSec=5
 Environment="PYTHONUNBUFFERED=1"
+Environment="NLTK_DATA=${APP_DIR}/nltk_data"
 
 [Install]
 WantedBy=multi-user.target
@@ -120,6 +119,47 @@ server {
         proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
         proxy_set_header X-Forwarded-Proto \$scheme;
     }
+
+    # Streaming upload endpoints: pass bodies through unbuffered, no 1 MB cap
+    location ~ ^/api/v1/(playground/hash/stream|playground/base64/stream|playground/json-to-csv/stream|ai/summarize/document)\$ {
+        proxy_pass http://127.0.0.1:8000;
+        proxy_set_header Host \$host;
+        proxy_set_header X-Real-IP \$remote_addr;
+        proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto \$scheme;
+        client_max_body_size 2g;
+        proxy_request_buffering off;
+        proxy_buffering off;
+        proxy_read_timeout 300s;
+    }
+
+    # Prometheus scrape target and the slow-request profiler: loopback only
+    location = /metrics {
+        allow 127.0.0.1;
+        deny all;
+        proxy_pass http://127.0.0.1:8000;
+    }
+
+    location = /api/v1/system/slow-requests {
+        allow 127.0.0.1;
+        deny all;
+        proxy_pass http://127.0.0.1:8000;
+    }
+
+    # Stored contact messages: export and search are local admin tools
+    location = /api/v1/contact/messages/export {
+        allow 127.0.0.1;
+        deny all;
+        proxy_pass http://127.0.0.1:8000;
+        proxy_buffering off;
+        proxy_read_timeout 300s;
+    }
+
+    location = /api/v1/contact/messages/search {
+        allow 127.0.0.1;
+        deny all;
+        proxy_pass http://127.0.0.1:8000;
+    }
 }
 EOF
 
@@ -4,38 +4,843 @@ Runs on personal VM: ubuntu-s-2vcpu-4gb-blr1-01
 Provides live server metrics, AI/NLP inference, and API playground endpoints.
 """
 
-from fastapi import FastAPI, HTTPException, Request
+import time
+
+_BOOT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from starlette.routing import Match
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+import orjson
 import psutil
 import platform
-import time
 import hashlib
 import base64
+import binascii
+import codecs
+import csv
+import functools
+import io
+import heapq
+import math
+import queue
+import random
+import signal
 import re
+import sys
+import tempfile
+import zlib
 import json
+import asyncio
+import logging
+import threading
+from array import array
 from datetime import datetime, timezone
 import sqlite3
 import os
-from collections import Counter
-from typing import Literal
-
+import multiprocessing
+import fcntl
+import mmap
+import struct
+import bisect
+import traceback
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Annotated, AsyncIterator, Callable, Iterable, Iterator, Literal
+
+log = logging.getLogger("uvicorn.error")
 
 # ─────────────────────────── App Setup ───────────────────────────
 
+async def _timed_step(timings: dict[str, float], name: str, fn, executor: "_Executor"):
+    start = time.perf_counter()
+    await executor.run(fn)
+    timings[name] = (time.perf_counter() - start) * 1000
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Download NLP data on startup."""
+    """
+    Initialize local state and start background samplers. Nothing here touches
+    the network; NLTK corpora are not needed at runtime (the sentiment lexicon
+    ships inside textblob) and deploy.sh provisions them into the app dir.
+    """
+    global _contact_queue
+    timings = {"imports": (time.perf_counter() - _BOOT_STARTED) * 1000}
+    await _timed_step(timings, "shared_state", shared_state.open, blocking_executor)
+    await _timed_step(timings, "db", _init_contact_db, db_executor)
+    await _timed_step(timings, "nlp", nlp_engine.load, nlp_executor)
+    await _timed_step(timings, "keyword_index", keyword_index.load, blocking_executor)
+    await _timed_step(timings, "ai_cache", ai_cache.open, blocking_executor)
+    await _timed_step(timings, "metrics", _prime_metrics, blocking_executor)
+    log.info(
+        "Startup complete in %.1f ms (%s)",
+        (time.perf_counter() - _BOOT_STARTED) * 1000,
+        ", ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()),
+    )
+
+    _contact_queue = asyncio.Queue(maxsize=CONTACT_QUEUE_SIZE)
+    telemetry.slow.start()
+    shared_state.claim_worker_slot()
+    _close_streams_on_exit_signal()
+    tasks = [
+        asyncio.create_task(_contact_writer(_contact_queue)),
+        asyncio.create_task(_metrics_sampler()),
+        asyncio.create_task(_process_sampler()),
+        asyncio.create_task(_keyword_index_checkpointer()),
+        asyncio.create_task(_worker_stats_publisher()),
+    ]
     try:
-        import nltk
-        nltk.download("punkt", quiet=True)
-        nltk.download("punkt_tab", quiet=True)
-        nltk.download("averaged_perceptron_tagger", quiet=True)
-        nltk.download("stopwords", quiet=True)
-    except Exception:
-        pass
-    yield
+        yield
+    finally:
+        await _drain_contact_queue()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if _batch_pool is not None:
+            _batch_pool.shutdown(cancel_futures=True)
+        regex_sandbox.shutdown()
+        for executor in EXECUTORS:
+            executor.shutdown()
+        if keyword_index.dirty:
+            keyword_index.save()
+        ai_cache.close()
+        _close_db_connections()
+
+
+# ── Admission control ──
+# Each route class gets its own concurrency limit and bounded wait queue, so a
+# flood of slow AI or regex calls can't starve the rest, plus a per-client
+# token bucket. Health checks and the SSE stream bypass both.
+
+# class: (max concurrent, max queued, tokens per second per IP, burst)
+ROUTE_LIMITS = {
+    "system": (16, 64, 10.0, 30),
+    "ai": (4, 16, 2.0, 10),
+    "playground": (8, 32, 5.0, 20),
+    "contact": (8, 64, 0.2, 5),  # the public form only
+    "messages": (4, 16, 5.0, 20),  # stored-message reads: list, search, export
+}
+# First match wins, so the message reads never share the form's tight bucket.
+ROUTE_PREFIXES = (
+    ("/api/v1/system/", "system"),
+    ("/api/v1/ai/", "ai"),
+    ("/api/v1/playground/", "playground"),
+    ("/api/v1/contact/", "messages"),
+    ("/api/v1/contact", "contact"),
+)
+ADMISSION_EXEMPT = {"/api/v1/system/health", "/api/v1/system/metrics/stream"}
+ADMISSION_QUEUE_TIMEOUT = 5.0
+# Set to 0 to drop per-IP rate limits or the concurrency gates; bench.py turns
+# both off so it measures the handlers rather than load shedding.
+RATE_LIMITS_ENABLED = os.environ.get("RATE_LIMITS_ENABLED", "1") != "0"
+ADMISSION_GATES_ENABLED = os.environ.get("ADMISSION_GATES_ENABLED", "1") != "0"
+TRUSTED_PROXIES = {"127.0.0.1", "::1"}
+MAX_TRACKED_CLIENTS = 50_000
+
+
+def _route_class(path: str) -> str | None:
+    for prefix, route_class in ROUTE_PREFIXES:
+        if path.startswith(prefix):
+            return route_class
+    return None
+
+
+def _scope_client_ip(scope) -> str:
+    """Peer address, or the address nginx appended to X-Forwarded-For when the peer is the proxy."""
+    peer = scope["client"][0] if scope.get("client") else "unknown"
+    if peer in TRUSTED_PROXIES:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                # nginx appends the address it saw; earlier entries are client-supplied.
+                return value.decode("latin-1").rsplit(",", 1)[-1].strip() or peer
+    return peer
+
+
+def _require_local_caller(request: Request):
+    """404 for anything but a loopback caller; nginx denies these paths to the outside too."""
+    if (request.client.host if request.client else None) not in TRUSTED_PROXIES:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+class _RouteGate:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, limit: int, queue_depth: int):
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        if self.semaphore.locked() and self.waiting >= self.queue_depth:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), ADMISSION_QUEUE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self.semaphore.release()
+
+
+_route_gates = {name: _RouteGate(limit, depth) for name, (limit, depth, _, _) in ROUTE_LIMITS.items()}
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware enforcing ROUTE_LIMITS before a request reaches a handler."""
+
+    def __init__(self, app):
+        self.app = app
+        # (ip, class) -> [tokens, last refill]; LRU-bounded
+        self.buckets: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+
+    def _take_token(self, ip: str, route_class: str) -> float:
+        """Consume one token; returns 0 on success or seconds until a token is available."""
+        _, _, rate, burst = ROUTE_LIMITS[route_class]
+        # Each worker enforces its share, so the per-IP limit holds across workers.
+        workers = shared_state.live_workers
+        rate, burst = rate / workers, max(1.0, burst / workers)
+        now = time.monotonic()
+        key = (ip, route_class)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(burst), now]
+            if len(self.buckets) > MAX_TRACKED_CLIENTS:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if scope["type"] == "http" and scope["path"] not in ADMISSION_EXEMPT:
+            route_class = _route_class(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self._take_token(_scope_client_ip(scope), route_class) if RATE_LIMITS_ENABLED else 0.0
+        if wait:
+            await self._reject(send, 429, "Rate limit exceeded", math.ceil(wait))
+            return
+
+        if not ADMISSION_GATES_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        gate = _route_gates[route_class]
+        if not await gate.acquire():
+            await self._reject(send, 503, f"Too many concurrent {route_class} requests", 2)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: int):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ── Request telemetry ──
+# Fixed-bucket histograms keyed by route template (never the raw path, so
+# cardinality stays bounded). Everything is updated on the event loop, so no
+# locking. Slow-request profiling is off unless SLOW_REQUEST_MS is set.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "0") or 0)
+SLOW_REQUEST_BUFFER = int(os.environ.get("SLOW_REQUEST_BUFFER", "50"))
+SLOW_SAMPLE_INTERVAL = 0.01
+SLOW_STACK_DEPTH = 24
+# Long-lived streams are slow by design and would crowd out real slow requests.
+SLOW_REQUEST_EXEMPT = frozenset({"/api/v1/system/metrics/stream"})
+# Anything else is labelled OTHER so clients can't mint new series.
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"})
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def state(self) -> list:
+        """[counts, sum, count]: the form workers publish and /metrics sums."""
+        return [list(self.counts), self.sum, self.count]
+
+
+def _render_histogram(name: str, labels: str, bounds: tuple[float, ...], state: list) -> Iterator[str]:
+    counts, total, count = state
+    sep = "," if labels else ""
+    cumulative = 0
+    for bound, n in zip(bounds, counts):
+        cumulative += n
+        yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}'
+    yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {count}'
+    yield f"{name}_sum{{{labels}}} {total:.6f}"
+    yield f"{name}_count{{{labels}}} {count}"
+
+
+_IDLE_FILES = {"threading.py", "selectors.py", "queue.py", "connection.py"}
+_IDLE_FRAMES = {("thread.py", "_worker"), ("runners.py", "run"), ("base_events.py", "run_forever")}
+
+
+class _SlowRequestProfiler:
+    """
+    While any request has been running longer than SLOW_REQUEST_MS, a daemon
+    thread samples every busy thread's stack every SLOW_SAMPLE_INTERVAL and
+    charges the folded stacks to each such request. Finished slow requests
+    land in a bounded ring buffer.
+    """
+
+    def __init__(self, threshold_ms: float, size: int):
+        self.threshold = threshold_ms / 1000
+        self.records: deque[dict] = deque(maxlen=size)
+        self.active: dict[int, list] = {}  # request id -> [started, Counter]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self):
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _fold(frame) -> str | None:
+        stack = traceback.extract_stack(frame)[-SLOW_STACK_DEPTH:]
+        # Idle pool workers and an idle event loop (parked in C under uvloop) are noise.
+        top = (os.path.basename(stack[-1].filename), stack[-1].name) if stack else None
+        if top is None or top[0] in _IDLE_FILES or top in _IDLE_FRAMES:
+            return None
+        return ";".join(f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})" for f in stack)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(SLOW_SAMPLE_INTERVAL)
+            cutoff = time.perf_counter() - self.threshold
+            slow = [entry[1] for entry in list(self.active.values()) if entry[0] < cutoff]
+            if not slow:
+                continue
+            stacks = [
+                folded for ident, frame in sys._current_frames().items()
+                if ident != own and (folded := self._fold(frame))
+            ]
+            for samples in slow:
+                samples.update(stacks)
+
+    def finish(self, request_id: int, record: dict):
+        entry = self.active.pop(request_id, None)
+        if entry is not None and record["duration_ms"] >= self.threshold * 1000:
+            record["stack_samples"] = [
+                {"stack": stack, "samples": n} for stack, n in entry[1].most_common(10)
+            ]
+            self.records.append(record)
+
+
+class _RequestTelemetry:
+    def __init__(self):
+        self.latency: dict[tuple[str, str], _Histogram] = {}
+        self.response_size: dict[tuple[str, str], _Histogram] = {}
+        self.responses: Counter[tuple[str, str, int]] = Counter()
+        self.in_flight: Counter[str] = Counter()
+        self.slow = _SlowRequestProfiler(SLOW_REQUEST_MS, SLOW_REQUEST_BUFFER)
+
+    def record(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route)
+        if key not in self.latency:
+            self.latency[key] = _Histogram(LATENCY_BUCKETS)
+            self.response_size[key] = _Histogram(SIZE_BUCKETS)
+        self.latency[key].observe(seconds)
+        self.response_size[key].observe(size)
+        self.responses[(method, route, status)] += 1
+
+
+telemetry = _RequestTelemetry()
+
+
+def _route_template(app, scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Requests answered before routing (CORS preflight, admission rejections, 404s).
+    for candidate in app.router.routes:
+        if candidate.matches(scope)[0] != Match.NONE:
+            return candidate.path
+    return "unmatched"
+
+
+class TelemetryMiddleware:
+    """Outermost ASGI middleware: latency, status, response size and in-flight per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        path = scope["path"]
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        route_class = _route_class(path) or "other"
+        request_id = id(scope)
+        track_slow = telemetry.slow.enabled and path not in SLOW_REQUEST_EXEMPT
+        if track_slow:
+            telemetry.slow.active[request_id] = [start, Counter()]
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        telemetry.in_flight[route_class] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            telemetry.in_flight[route_class] -= 1
+            elapsed = time.perf_counter() - start
+            route = _route_template(app, scope)
+            telemetry.record(method, route, status, elapsed, size)
+            if track_slow:
+                telemetry.slow.finish(request_id, {
+                    "method": method,
+                    "route": route,
+                    "path": path,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "finished_at": datetime.now(timezone.utc).isoformat(),
+                })
+
+
+# ── Executors ──
+# Trivial handlers are `async def` and run on the event loop. Anything that
+# blocks is sent explicitly to one of these pools rather than FastAPI's shared
+# threadpool, so slow NLP calls can't starve SQLite or the cheap routes.
+
+NLP_THREADS = int(os.environ.get("NLP_THREADS", str(min(4, os.cpu_count() or 1))))
+DB_THREADS = int(os.environ.get("DB_THREADS", "4"))
+BLOCKING_THREADS = int(os.environ.get("BLOCKING_THREADS", "8"))
+
+
+class _Executor:
+    """Named thread pool that tracks pending calls and queue wait for /metrics."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix=name)
+        self.pending = 0
+        self.wait = _Histogram(LATENCY_BUCKETS)
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        started = None
+
+        def call():
+            nonlocal started
+            started = time.perf_counter()
+            return fn(*args)
+
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self.pool, call)
+        finally:
+            self.pending -= 1
+            if started is not None:
+                self.wait.observe(started - submitted)
+
+    async def iterate(self, iterator: Iterator) -> AsyncIterator:
+        """Drive a blocking iterator from this pool, one item per hop."""
+        done = object()
+        try:
+            while (item := await self.run(next, iterator, done)) is not done:
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                await self.run(close)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+nlp_executor = _Executor("nlp", NLP_THREADS)
+db_executor = _Executor("sqlite", DB_THREADS)
+blocking_executor = _Executor("blocking", BLOCKING_THREADS)
+EXECUTORS = (nlp_executor, db_executor, blocking_executor)
+
+# Uploads are spooled in memory up to this size, then to a temp file.
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+
+async def _spool_write(spool: tempfile.SpooledTemporaryFile, chunk: bytes, received: int):
+    """
+    Append a request body chunk. While the spool is still in memory the
+    write is a memcpy and stays on the loop; the write that rolls it over and
+    every disk write after it go to blocking_executor.
+    """
+    if received <= SPOOL_MEMORY_BYTES:
+        spool.write(chunk)
+    else:
+        await blocking_executor.run(spool.write, chunk)
+
+
+# ── Shared state ──
+# Every uvicorn worker maps the same file on /dev/shm (tmpfs, so pages only
+# exist once written). One worker holds the leader lock and runs the
+# samplers; the others read its output straight from the map. Each region is
+# a seqlock: the writer bumps the sequence to odd, writes, bumps it to even,
+# and readers retry if it moved, so nobody ever waits on the writer. Locks are
+# POSIX record locks on single bytes of the file, which the kernel drops if a
+# worker dies, letting another worker take over. The layout version is part
+# of the file name so a new deploy never remaps an old layout.
+
+SHARED_STATE_LAYOUT = 1
+SHARED_STATE_SIZE = 16 * 1024 * 1024
+WORKER_SLOTS = 16
+WORKER_SLOT_BYTES = 256 * 1024
+WORKER_STATS_INTERVAL = 2.0
+
+
+def _default_shared_state_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    app_id = hashlib.blake2b(os.path.abspath(__file__).encode(), digest_size=4).hexdigest()
+    return os.path.join(base, f"portfolio-api-{app_id}-v{SHARED_STATE_LAYOUT}.state")
+
+
+# Empty disables sharing: the map is process-private and this worker always leads.
+SHARED_STATE_PATH = os.environ.get("SHARED_STATE_PATH", _default_shared_state_path())
+
+_LOCK_INIT, _LOCK_LEADER, _LOCK_COUNTERS, _LOCK_SLOTS = 0, 1, 2, 8
+_STATE_HEADER = struct.Struct("<8sQqd")  # magic, layout, message count, count read at
+_STATE_MAGIC = b"PFAPISTA"
+_REGION_HEADER = struct.Struct("<QQQ")  # seq, payload length, writer pid
+SEQLOCK_RETRIES = 100  # ~10 ms of 0.1 ms naps before a reader stops waiting on a writer
+
+
+class SharedRegion:
+    """Seqlock-guarded byte slot inside the shared map, attached once the map is open."""
+
+    def __init__(self):
+        self.buf: memoryview | None = None
+        self.capacity = 0
+
+    def attach(self, buf: memoryview):
+        self.buf = buf
+        self.capacity = len(buf) - _REGION_HEADER.size
+
+    @property
+    def seq(self) -> int:
+        return _REGION_HEADER.unpack_from(self.buf)[0]
+
+    def write(self, payload: bytes) -> bool:
+        if len(payload) > self.capacity:
+            return False
+        seq = self.seq + (self.seq & 1)  # a writer that died mid-write leaves it odd
+        _REGION_HEADER.pack_into(self.buf, 0, seq + 1, 0, os.getpid())
+        self.buf[_REGION_HEADER.size:_REGION_HEADER.size + len(payload)] = payload
+        _REGION_HEADER.pack_into(self.buf, 0, seq + 2, len(payload), os.getpid())
+        return True
+
+    def read(self) -> tuple[int, int, bytes | None]:
+        """Return (seq, writer pid, payload); payload is None if never written or mid-write."""
+        for _ in range(SEQLOCK_RETRIES):
+            seq, length, pid = _REGION_HEADER.unpack_from(self.buf)
+            if seq & 1:
+                time.sleep(0.0001)
+                continue
+            payload = bytes(self.buf[_REGION_HEADER.size:_REGION_HEADER.size + length]) if seq else None
+            if self.seq == seq:
+                return seq, pid, payload
+        return seq, pid, None
+
+
+class SharedState:
+    """
+    The layout is fixed at import (every process reserves blocks in the same
+    order) but nothing is mapped until open() runs in the lifespan, so batch
+    and regex subprocesses that re-import this module never touch the file.
+    """
+
+    def __init__(self, path: str | None, size: int):
+        self.path = path
+        self.size = size
+        self.fd: int | None = None
+        self.map: mmap.mmap | None = None
+        self.is_leader = False
+        self.worker_slot: int | None = None
+        self._next = _STATE_HEADER.size
+        self._blocks: list[tuple[int, int, Callable[[memoryview], None]]] = []
+        self._counter_lock = threading.Lock()
+        self.workers = [self.region(WORKER_SLOT_BYTES) for _ in range(WORKER_SLOTS)]
+        self.live_workers = 1
+
+    def allocate(self, nbytes: int, attach: Callable[[memoryview], None]):
+        """Reserve the next 8-byte-aligned block; `attach` receives it when the map is opened."""
+        start = self._next
+        self._next = (start + nbytes + 7) & ~7
+        if self._next > self.size:
+            raise RuntimeError("SHARED_STATE_SIZE is too small for the shared layout")
+        self._blocks.append((start, nbytes, attach))
+
+    def region(self, nbytes: int) -> SharedRegion:
+        region = SharedRegion()
+        self.allocate(nbytes, region.attach)
+        return region
+
+    def open(self):
+        if self.map is not None:
+            return
+        if not self.path:
+            self.map = mmap.mmap(-1, self.size)
+            self.is_leader = True
+        else:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, _LOCK_INIT)
+            try:
+                if os.fstat(self.fd).st_size < self.size:
+                    os.ftruncate(self.fd, self.size)
+                self.map = mmap.mmap(self.fd, self.size)
+                magic, layout, _, _ = _STATE_HEADER.unpack_from(self.map)
+                if magic != _STATE_MAGIC or layout != SHARED_STATE_LAYOUT:
+                    _STATE_HEADER.pack_into(self.map, 0, _STATE_MAGIC, SHARED_STATE_LAYOUT, -1, 0.0)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, _LOCK_INIT)
+        view = memoryview(self.map)
+        for start, nbytes, attach in self._blocks:
+            attach(view[start:start + nbytes])
+
+    def _try_lock(self, offset: int) -> bool:
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+            return True
+        except OSError:
+            return False
+
+    def try_lead(self) -> bool:
+        """Become the leader if nobody holds the lock; cheap enough to call every tick."""
+        if not self.is_leader and self._try_lock(_LOCK_LEADER):
+            self.is_leader = True
+            log.info("Worker %d is now the leader (metrics sampling, process sampling)", os.getpid())
+        return self.is_leader
+
+    def claim_worker_slot(self):
+        if self.fd is None:
+            self.worker_slot = 0
+            return
+        for i in range(WORKER_SLOTS):
+            if self._try_lock(_LOCK_SLOTS + i):
+                self.worker_slot = i
+                return
+        log.warning("All %d shared worker slots are taken; this worker's stats won't be aggregated", WORKER_SLOTS)
+
+    def publish_worker_stats(self, payload: bytes):
+        if self.worker_slot is not None and not self.workers[self.worker_slot].write(payload):
+            log.warning("Worker stats (%d bytes) exceed WORKER_SLOT_BYTES", len(payload))
+
+    def peer_stats(self) -> list[bytes]:
+        """Latest stats from every other live worker; also refreshes live_workers."""
+        peers = []
+        for i, region in enumerate(self.workers):
+            if i == self.worker_slot:
+                continue
+            _, pid, payload = region.read()
+            if payload is None or not _pid_alive(pid):
+                continue
+            peers.append(payload)
+        self.live_workers = len(peers) + 1
+        return peers
+
+    @contextmanager
+    def _counters(self):
+        with self._counter_lock:
+            if self.fd is None:
+                yield
+                return
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, _LOCK_COUNTERS)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, _LOCK_COUNTERS)
+
+    def message_count(self) -> tuple[int, float]:
+        """(count, wall time it was last recounted); count is -1 until someone counts."""
+        _, _, count, read_at = _STATE_HEADER.unpack_from(self.map)
+        return count, read_at
+
+    def set_message_count(self, count: int):
+        with self._counters():
+            _STATE_HEADER.pack_into(self.map, 0, _STATE_MAGIC, SHARED_STATE_LAYOUT, count, time.time())
+
+    def add_messages(self, n: int):
+        with self._counters():
+            magic, layout, count, read_at = _STATE_HEADER.unpack_from(self.map)
+            if count >= 0:
+                _STATE_HEADER.pack_into(self.map, 0, magic, layout, count + n, read_at)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+shared_state = SharedState(SHARED_STATE_PATH or None, SHARED_STATE_SIZE)
+
+
+# ── Responses ──
+# orjson renders the default JSON responses. Handlers whose payload is already
+# plain JSON types return FastJSONResponse themselves, which skips FastAPI's
+# jsonable_encoder walk entirely.
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# ── Compression ──
+# Single-body responses above COMPRESS_MIN_BYTES are brotli- or gzip-encoded
+# per Accept-Encoding. Multi-chunk streams pass through untouched so SSE and
+# streamed exports keep flushing promptly (exports have their own ?gzip=).
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_TYPES = (b"application/json", b"text/", b"application/x-ndjson")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def _negotiate_encoding(accept_encoding: str) -> str | None:
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        offered[name.strip()] = q
+    for encoding in (("br",) if brotli else ()) + ("gzip",):
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((v for k, v in scope["headers"] if k == b"accept-encoding"), b"")
+        encoding = _negotiate_encoding(accept.decode("latin-1")) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message  # held until we see the first body chunk
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = {k.lower(): v for k, v in start["headers"]}
+            eligible = (
+                not message.get("more_body", False)
+                and len(body) >= COMPRESS_MIN_BYTES
+                and b"content-encoding" not in headers
+                and headers.get(b"content-type", b"").startswith(COMPRESS_TYPES)
+            )
+            if eligible:
+                body = _compress(body, encoding)
+                raw = [(k, v) for k, v in start["headers"] if k.lower() not in (b"content-length", b"vary")]
+                vary = headers.get(b"vary")
+                raw += [
+                    (b"content-encoding", encoding.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+                ]
+                # A strong ETag names the identity bytes; the encoded variant gets a weak one.
+                if b"etag" in headers and not headers[b"etag"].startswith(b"W/"):
+                    raw = [(k, b"W/" + v if k.lower() == b"etag" else v) for k, v in raw]
+                start = {**start, "headers": raw}
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
 
 app = FastAPI(
@@ -48,8 +853,11 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Added first so CORS wraps it and rejections still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -64,6 +872,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Inside telemetry, so response-size histograms count bytes on the wire.
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TelemetryMiddleware)
 
 
 # ─────────────────────────── Shared Models ───────────────────────────
@@ -72,14 +883,28 @@ class TextInput(BaseModel):
     text: str = Field(..., min_length=1, max_length=5000, description="Input text to analyze")
 
 
+class AnalyzeInput(TextInput):
+    operations: list[Literal["sentiment", "keywords", "summarize"]] = Field(
+        default=["sentiment", "keywords", "summarize"], min_length=1, description="Analyses to run"
+    )
+
+
+class BatchInput(BaseModel):
+    texts: list[Annotated[str, Field(min_length=1, max_length=5000)]] = Field(..., min_length=1, max_length=1000, description="Texts to analyze")
+    operations: list[Literal["sentiment", "keywords", "summarize"]] = Field(
+        default=["sentiment"], min_length=1, description="Analyses to run on every text"
+    )
+
+
 class HashInput(BaseModel):
     text: str = Field(..., min_length=1, max_length=5000)
-    algorithm: Literal["md5", "sha1", "sha256", "sha512"] = "sha256"
+    algorithm: Literal["md5", "sha1", "sha256", "sha512", "blake2b"] = "sha256"
 
 
 class Base64Input(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000)
     action: Literal["encode", "decode"] = "encode"
+    alphabet: Literal["standard", "urlsafe"] = "standard"
 
 
 class JSONToCSVInput(BaseModel):
@@ -94,35 +919,205 @@ class ContactInput(BaseModel):
 
 # ─────────────────────────── SYSTEM METRICS ───────────────────────────
 
+# Weak: the body carries a fresh timestamp, so it is only equivalent, not identical.
+HEALTH_ETAG = 'W/"healthy-1.0.0"'
+
+
 @app.get("/api/v1/system/health", tags=["System"])
-def health_check():
-    """Simple health check endpoint."""
-    return {
+async def health_check(request: Request):
+    """Simple health check endpoint. Pollers can revalidate with If-None-Match."""
+    headers = {"ETag": HEALTH_ETAG, "Cache-Control": "no-cache"}
+    if _etag_matches(request, HEALTH_ETAG):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "version": "1.0.0",
-    }
+    }, headers=headers)
 
 
-@app.get("/api/v1/system/metrics", tags=["System"])
-def system_metrics():
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "1.0"))
+
+# Facts that never change while the process is alive — computed once.
+_STATIC_INFO = {
+    "cores": psutil.cpu_count(logical=True),
+    "boot_time": psutil.boot_time(),
+    "platform": platform.platform(),
+    "hostname": platform.node(),
+    "python_version": platform.python_version(),
+}
+
+# Latest sample, replaced wholesale by the sampler so readers never see a
+# half-written dict.
+_metrics_snapshot: dict = {}
+_last_net: tuple[float, int, int] | None = None
+
+
+# ── Metrics history ──
+# Columnar ring buffers in the shared map: raw samples for an hour, 1-minute
+# rollups for a day, 1-hour rollups for 30 days (~320 KB total). Only the
+# leader appends; rollup buckets in progress are leader-local.
+
+HISTORY_FIELDS = ("cpu", "memory", "disk", "load_1m", "net_sent_kbps", "net_recv_kbps")
+
+
+class _RingSeries:
     """
-    Real-time server metrics: CPU, memory, disk, network, uptime.
-    Polled live from the Ubuntu VM.
+    Fixed-capacity ring buffer storing one float column per field, laid out
+    in the shared map so every worker reads the leader's history in place.
+    The (seq, head, size) header makes it a seqlock like SharedRegion.
     """
-    cpu = psutil.cpu_percent(interval=0.5)
+
+    __slots__ = ("step", "capacity", "header", "ts", "cols")
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        shared_state.allocate(self.nbytes(capacity), self.attach)
+
+    def attach(self, buf: memoryview):
+        self.header = buf[:_REGION_HEADER.size]
+        columns = buf[_REGION_HEADER.size:].cast("d")
+        self.ts = columns[:self.capacity]
+        self.cols = {
+            f: columns[(n + 1) * self.capacity:(n + 2) * self.capacity] for n, f in enumerate(HISTORY_FIELDS)
+        }
+
+    @staticmethod
+    def nbytes(capacity: int) -> int:
+        return _REGION_HEADER.size + 8 * capacity * (len(HISTORY_FIELDS) + 1)
+
+    def append(self, ts: float, values: tuple[float, ...]):
+        seq, head, size = _REGION_HEADER.unpack_from(self.header)
+        seq += seq & 1
+        _REGION_HEADER.pack_into(self.header, 0, seq + 1, head, size)
+        self.ts[head] = ts
+        for f, v in zip(HISTORY_FIELDS, values):
+            self.cols[f][head] = v
+        _REGION_HEADER.pack_into(
+            self.header, 0, seq + 2, (head + 1) % self.capacity, min(size + 1, self.capacity)
+        )
+
+    def since(self, start_ts: float) -> dict:
+        """
+        Return samples with ts >= start_ts as column lists, oldest first.
+        Readers never wait long: a leader killed mid-append leaves seq odd
+        until the next leader appends to this series (up to an hour for
+        "1h"), so after SEQLOCK_RETRIES the unchecked read is returned. The
+        header still describes the rows before the interrupted append.
+        """
+        for _ in range(SEQLOCK_RETRIES):
+            seq = _REGION_HEADER.unpack_from(self.header)[0]
+            if not seq & 1:
+                result = self._since(start_ts)
+                if _REGION_HEADER.unpack_from(self.header)[0] == seq:
+                    return result
+            time.sleep(0.0001)
+        return self._since(start_ts)
+
+    def _since(self, start_ts: float) -> dict:
+        _, head, size = _REGION_HEADER.unpack_from(self.header)
+        first = (head - size) % self.capacity
+        # Binary search over logical (chronological) positions.
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[(first + mid) % self.capacity] < start_ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        begin = (first + lo) % self.capacity
+        count = size - lo
+        end = begin + count
+        if end <= self.capacity:
+            spans = [(begin, end)]
+        else:
+            spans = [(begin, self.capacity), (0, end - self.capacity)]
+
+        def take(column: memoryview) -> list[float]:
+            out = column[spans[0][0]:spans[0][1]].tolist()
+            if len(spans) > 1:
+                out += column[spans[1][0]:spans[1][1]].tolist()
+            return out
+
+        result = {"timestamps": take(self.ts)}
+        for f in HISTORY_FIELDS:
+            result[f] = take(self.cols[f])
+        return result
+
+
+class _Rollup:
+    """Averages samples falling into the same `step`-second bucket."""
+
+    __slots__ = ("step", "bucket", "sums", "count")
+
+    def __init__(self, step: int):
+        self.step = step
+        self.bucket = None
+        self.sums = [0.0] * len(HISTORY_FIELDS)
+        self.count = 0
+
+    def add(self, ts: float, values: tuple[float, ...]):
+        """Add a sample; returns (bucket_ts, averages) when a bucket closes."""
+        bucket = ts - ts % self.step
+        closed = None
+        if self.bucket is not None and bucket != self.bucket and self.count:
+            closed = (self.bucket, tuple(s / self.count for s in self.sums))
+            self.sums = [0.0] * len(HISTORY_FIELDS)
+            self.count = 0
+        self.bucket = bucket
+        for i, v in enumerate(values):
+            self.sums[i] += v
+        self.count += 1
+        return closed
+
+
+HISTORY_RESOLUTIONS = {
+    name: _RingSeries(step, capacity)
+    for name, step, capacity in (("raw", 1, 3600), ("1m", 60, 1440), ("1h", 3600, 720))
+}
+_minute_rollup = _Rollup(60)
+_hour_rollup = _Rollup(3600)
+_history_lock = threading.Lock()  # serializes the leader's appends; readers rely on the seqlock
+
+
+def _record_history(ts: float, values: tuple[float, ...]):
+    with _history_lock:
+        HISTORY_RESOLUTIONS["raw"].append(ts, values)
+        closed = _minute_rollup.add(ts, values)
+        if closed:
+            HISTORY_RESOLUTIONS["1m"].append(*closed)
+            closed = _hour_rollup.add(*closed)
+            if closed:
+                HISTORY_RESOLUTIONS["1h"].append(*closed)
+
+
+def _sample_metrics() -> dict:
+    """Take one non-blocking psutil sample and publish it as the snapshot."""
+    global _metrics_snapshot, _last_net
+
+    # interval=None returns usage since the previous call instead of sleeping.
+    cpu = psutil.cpu_percent(interval=None)
     cpu_freq = psutil.cpu_freq()
     mem = psutil.virtual_memory()
     disk = psutil.disk_usage("/")
     net = psutil.net_io_counters()
-    boot = psutil.boot_time()
-    uptime = int(time.time() - boot)
     load = psutil.getloadavg()
 
-    return {
+    now = time.time()
+    sent_kbps = recv_kbps = 0.0
+    if _last_net is not None and now > _last_net[0]:
+        elapsed = now - _last_net[0]
+        sent_kbps = max(net.bytes_sent - _last_net[1], 0) / 1024 / elapsed
+        recv_kbps = max(net.bytes_recv - _last_net[2], 0) / 1024 / elapsed
+    _last_net = (now, net.bytes_sent, net.bytes_recv)
+    if shared_state.is_leader:
+        _record_history(now, (cpu, mem.percent, disk.percent, load[0], sent_kbps, recv_kbps))
+
+    _metrics_snapshot = {
         "cpu": {
             "percent": cpu,
-            "cores": psutil.cpu_count(logical=True),
+            "cores": _STATIC_INFO["cores"],
             "freq_mhz": round(cpu_freq.current, 0) if cpu_freq else None,
         },
         "memory": {
@@ -139,17 +1134,502 @@ def system_metrics():
             "bytes_sent_mb": round(net.bytes_sent / (1024**2), 2),
             "bytes_recv_mb": round(net.bytes_recv / (1024**2), 2),
         },
-        "uptime_seconds": uptime,
+        "uptime_seconds": int(time.time() - _STATIC_INFO["boot_time"]),
         "load_average": {
             "1m": round(load[0], 2),
             "5m": round(load[1], 2),
             "15m": round(load[2], 2),
         },
-        "platform": platform.platform(),
-        "hostname": platform.node(),
-        "python_version": platform.python_version(),
+        "platform": _STATIC_INFO["platform"],
+        "hostname": _STATIC_INFO["hostname"],
+        "python_version": _STATIC_INFO["python_version"],
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    return _metrics_snapshot
+
+
+def _prime_metrics():
+    """Startup: the leader takes its first samples; followers adopt the leader's if it has any."""
+    if shared_state.try_lead() or not _follow_metrics():
+        _publish_metrics(_sample_metrics())
+    if shared_state.is_leader:
+        _sample_processes()
+
+
+async def _metrics_sampler():
+    """
+    The leader refreshes the snapshot every METRICS_INTERVAL seconds and
+    writes it to the shared map; other workers poll the map for new samples
+    and take over sampling if the leader goes away.
+    """
+    while True:
+        if not shared_state.try_lead():
+            await asyncio.sleep(METRICS_INTERVAL / 4)
+            _follow_metrics()
+            continue
+        await asyncio.sleep(METRICS_INTERVAL)
+        try:
+            snapshot = await blocking_executor.run(_sample_metrics)
+        except Exception:
+            # A failed read (e.g. transient /proc error) keeps the last snapshot.
+            continue
+        _publish_metrics(snapshot)
+
+
+# ── Metrics streaming ──
+# Each tick is serialized once (by the leader) and the same bytes are handed
+# to every subscriber queue in every worker. A client whose queue fills up is
+# too slow and is dropped.
+
+STREAM_QUEUE_SIZE = 8
+MAX_STREAM_SUBSCRIBERS = int(os.environ.get("MAX_STREAM_SUBSCRIBERS", "1000"))
+_stream_subscribers: set[asyncio.Queue] = set()
+_streams_closed = False
+_latest_frame: bytes = b""
+_metrics_body: bytes = b""
+_metrics_region = shared_state.region(64 * 1024)
+_metrics_seq = 0  # region sequence this worker last adopted
+
+
+def _publish_metrics(snapshot: dict):
+    body = orjson.dumps(snapshot)
+    if shared_state.is_leader:
+        _metrics_region.write(body)
+    _publish_frame(body)
+
+
+def _follow_metrics() -> bool:
+    """Adopt the leader's latest sample if it changed; False if it hasn't published one yet."""
+    global _metrics_snapshot, _metrics_seq
+    seq, _, body = _metrics_region.read()
+    if body is None:
+        return False
+    if seq != _metrics_seq:
+        _metrics_seq = seq
+        _metrics_snapshot = orjson.loads(body)
+        _publish_frame(body)
+    return True
+
+
+def _publish_frame(body: bytes):
+    global _latest_frame, _metrics_body
+    _metrics_body = body
+    _latest_frame = b"event: metrics\ndata: " + body + b"\n\n"
+    for queue in list(_stream_subscribers):
+        try:
+            queue.put_nowait(_latest_frame)
+        except asyncio.QueueFull:
+            _stream_subscribers.discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)  # tells the stream to close
+
+
+def _close_streams():
+    """End every open stream and refuse new ones; the server is going away."""
+    global _streams_closed
+    _streams_closed = True
+    for queue in list(_stream_subscribers):
+        _stream_subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+def _close_streams_on_exit_signal():
+    """
+    uvicorn waits for open responses to finish before it runs the lifespan
+    shutdown, and an SSE stream never finishes on its own. Chain onto the
+    server's SIGTERM/SIGINT handlers so streams end as soon as shutdown
+    starts and the contact drain and index checkpoint still run.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(_close_streams)
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+async def _metrics_stream(queue: asyncio.Queue):
+    try:
+        yield b"retry: 5000\n\n"
+        if _latest_frame:
+            yield _latest_frame
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                return
+            yield frame
+    finally:
+        _stream_subscribers.discard(queue)
+
+
+@app.get("/api/v1/system/metrics", tags=["System"])
+async def system_metrics():
+    """
+    Real-time server metrics: CPU, memory, disk, network, uptime.
+    Served from the snapshot kept fresh by the background sampler, already
+    serialized when it was published.
+    """
+    if _metrics_body:
+        return Response(_metrics_body, media_type="application/json")
+    return FastJSONResponse(_sample_metrics())
+
+
+@app.get("/api/v1/system/metrics/stream", tags=["System"])
+async def system_metrics_stream():
+    """
+    Server-Sent Events stream of the metrics snapshot, pushed on every sampler tick.
+    GET /api/v1/system/metrics remains available for one-off polling.
+    """
+    if _streams_closed:
+        raise HTTPException(status_code=503, detail="Server is restarting", headers={"Retry-After": "5"})
+    if len(_stream_subscribers) >= MAX_STREAM_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers, poll /api/v1/system/metrics instead")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    _stream_subscribers.add(queue)
+    return StreamingResponse(
+        _metrics_stream(queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ── Process breakdown ──
+# psutil.Process objects are kept between samples so cpu_percent() is a cheap
+# delta against the previous read; /proc is only rescanned by the sampler.
+
+PROCESS_INTERVAL = float(os.environ.get("PROCESS_INTERVAL", "5.0"))
+
+# service name -> predicate over (process name, joined cmdline)
+SERVICE_MATCHERS = {
+    "portfolio-api": lambda name, cmd: "main:app" in cmd,
+    "deploy-webhook": lambda name, cmd: "webhook_deploy.py" in cmd,  # port 9000
+    "nginx": lambda name, cmd: name == "nginx",
+    "voice-agent": lambda name, cmd: "agent.py" in cmd,
+}
+
+# pid -> (Process, name, cmdline); name/cmdline don't change so they're read once
+_proc_cache: dict[int, tuple[psutil.Process, str, str]] = {}
+_process_snapshot: dict = {"processes": [], "services": {}, "timestamp": None}
+_process_region = shared_state.region(1024 * 1024)
+_process_seq = 0
+
+
+def _sample_processes() -> dict:
+    """Refresh per-process CPU/RSS using the cached Process objects."""
+    global _process_snapshot
+
+    live = set(psutil.pids())
+    for pid in list(_proc_cache):
+        if pid not in live:
+            del _proc_cache[pid]
+
+    for pid in live - _proc_cache.keys():
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                name = proc.name()
+                cmdline = " ".join(proc.cmdline())
+                proc.cpu_percent(interval=None)  # prime the delta; first read is 0.0
+            _proc_cache[pid] = (proc, name, cmdline)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+
+    processes = []
+    # cmdline can carry tokens and passwords, so it's only used for service
+    # matching and never leaves this function
+    cmdlines: dict[int, str] = {}
+    for pid, (proc, name, cmdline) in list(_proc_cache.items()):
+        try:
+            with proc.oneshot():
+                cpu = proc.cpu_percent(interval=None)
+                rss = proc.memory_info().rss
+        except psutil.NoSuchProcess:
+            del _proc_cache[pid]
+            continue
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+        processes.append({
+            "pid": pid,
+            "name": name,
+            "cpu_percent": round(cpu, 1),
+            "rss_mb": round(rss / (1024**2), 1),
+        })
+        cmdlines[pid] = cmdline
+
+    services = {}
+    for service, matches in SERVICE_MATCHERS.items():
+        members = [p for p in processes if matches(p["name"], cmdlines[p["pid"]])]
+        services[service] = {
+            "running": bool(members),
+            "pids": [p["pid"] for p in members],
+            "cpu_percent": round(sum(p["cpu_percent"] for p in members), 1),
+            "rss_mb": round(sum(p["rss_mb"] for p in members), 1),
+        }
+
+    _process_snapshot = {
+        "processes": processes,
+        "services": services,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
+    if shared_state.is_leader:
+        _process_region.write(orjson.dumps(_process_snapshot))
+    return _process_snapshot
+
+
+def _current_processes() -> dict:
+    """The leader's latest process snapshot, re-read from the shared map only when it changed."""
+    global _process_snapshot, _process_seq
+    if not shared_state.is_leader:
+        seq, _, body = _process_region.read()
+        if body is not None and seq != _process_seq:
+            _process_snapshot = orjson.loads(body)
+            _process_seq = seq
+    return _process_snapshot
+
+
+async def _process_sampler():
+    """Refresh the process snapshot every PROCESS_INTERVAL seconds (leader only)."""
+    while True:
+        await asyncio.sleep(PROCESS_INTERVAL)
+        if not shared_state.is_leader:
+            continue
+        try:
+            await blocking_executor.run(_sample_processes)
+        except Exception:
+            pass
+
+
+@app.get("/api/v1/system/processes", tags=["System"])
+async def system_processes(limit: int = 10, sort: Literal["cpu", "memory"] = "cpu"):
+    """
+    Top processes by CPU or resident memory, plus per-service totals for
+    portfolio-api, the deploy webhook, nginx and the voice agent.
+    """
+    snapshot = _current_processes()
+    key = "cpu_percent" if sort == "cpu" else "rss_mb"
+    top = sorted(snapshot["processes"], key=lambda p: p[key], reverse=True)
+    return FastJSONResponse({
+        "processes": top[: max(1, min(limit, 50))],
+        "services": snapshot["services"],
+        "process_count": len(snapshot["processes"]),
+        "timestamp": snapshot["timestamp"],
+    })
+
+
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_window(window: str) -> int:
+    """Parse '90', '15m', '6h' or '7d' into seconds."""
+    match = re.fullmatch(r"(\d+)([smhd]?)", window.strip().lower())
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid window, use e.g. 300, 15m, 6h, 7d")
+    return int(match.group(1)) * _WINDOW_UNITS[match.group(2) or "s"]
+
+
+@app.get("/api/v1/system/metrics/history", tags=["System"])
+async def system_metrics_history(
+    window: str = "1h",
+    resolution: Literal["auto", "raw", "1m", "1h"] = "auto",
+):
+    """
+    Historical CPU, memory, disk, load and network throughput.
+    Returned column-wise (one list per field) from fixed-size ring buffers.
+    """
+    seconds = _parse_window(window)
+    if not 0 < seconds <= 30 * 86400:
+        raise HTTPException(status_code=400, detail="Window must be between 1s and 30d")
+
+    if resolution == "auto":
+        resolution = "raw" if seconds <= 3600 else "1m" if seconds <= 86400 else "1h"
+    series = HISTORY_RESOLUTIONS[resolution]
+
+    data = series.since(time.time() - seconds)
+
+    return FastJSONResponse({
+        "window_seconds": seconds,
+        "resolution": resolution,
+        "step_seconds": series.step,
+        "points": len(data["timestamps"]),
+        **data,
+    })
+
+
+# ── Prometheus exposition ──
+# Text format 0.0.4, rendered on demand from the in-process telemetry. nginx
+# only allows /metrics from localhost; scrape it over the loopback port.
+
+def _prom_labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{k}="{escape(v)}"' for k, v in labels.items())
+
+
+def _worker_stats() -> dict:
+    """
+    This worker's counters and gauges in a JSON-able form. Leaves are numbers
+    or [counts, sum, count] histogram states, so any number of workers can be
+    summed key by key.
+    """
+    cache = ai_cache.stats()
+    return {
+        "responses": {f"{m}\t{r}\t{s}": n for (m, r, s), n in telemetry.responses.items()},
+        "latency": {f"{m}\t{r}": h.state() for (m, r), h in telemetry.latency.items()},
+        "size": {f"{m}\t{r}": h.state() for (m, r), h in telemetry.response_size.items()},
+        "in_flight": dict(telemetry.in_flight),
+        "executors": {
+            e.name: {"pending": e.pending, "threads": e.workers, "wait": e.wait.state()} for e in EXECUTORS
+        },
+        "admission": {name: {"waiting": g.waiting, "rejected": g.rejected} for name, g in _route_gates.items()},
+        "gauges": {
+            "ai_cache_entries": cache["size"],
+            "contact_queue_depth": _contact_queue.qsize() if _contact_queue is not None else 0,
+            "metrics_stream_subscribers": len(_stream_subscribers),
+        },
+        "counters": {
+            **{f"ai_cache_{key}_total": cache[key] for key in AI_CACHE_COUNTERS},
+            "regex_workers_killed_total": regex_sandbox.killed,
+        },
+    }
+
+
+def _sum_stats(total, other):
+    if isinstance(total, dict):
+        for key, value in other.items():
+            total[key] = _sum_stats(total[key], value) if key in total else value
+        return total
+    if isinstance(total, list):
+        return [_sum_stats(a, b) for a, b in zip(total, other)]
+    return total + other
+
+
+def _aggregate_stats() -> tuple[dict, int]:
+    """This worker's live stats plus the last ones each other worker published."""
+    stats = _worker_stats()
+    peers = shared_state.peer_stats()
+    for payload in peers:
+        stats = _sum_stats(stats, orjson.loads(payload))
+    return stats, len(peers) + 1
+
+
+async def _worker_stats_publisher():
+    """Publish this worker's stats to its shared slot so any worker can answer /metrics."""
+    while True:
+        await asyncio.sleep(WORKER_STATS_INTERVAL)
+        shared_state.publish_worker_stats(orjson.dumps(_worker_stats()))
+        shared_state.peer_stats()  # refreshes live_workers for the rate limiter
+
+
+AI_CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations", "disk_hits")
+_COUNTER_HELP = {
+    **{f"ai_cache_{key}_total": f"AI result cache {key.replace('_', ' ')}." for key in AI_CACHE_COUNTERS},
+    "regex_workers_killed_total": "Regex workers killed after a pattern ran past REGEX_TIMEOUT.",
+}
+_GAUGE_HELP = {
+    "ai_cache_entries": "Entries in the in-memory AI result cache.",
+    "contact_queue_depth": "Contact submissions waiting for the writer.",
+    "metrics_stream_subscribers": "Connected SSE metrics clients.",
+}
+
+
+def _render_prometheus() -> str:
+    stats, workers = _aggregate_stats()
+    lines = []
+
+    def family(name: str, kind: str, help_text: str):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    family("api_workers", "gauge", "Live uvicorn workers contributing to these metrics.")
+    lines.append(f"api_workers {workers}")
+
+    family("http_requests_total", "counter", "Responses by route template and status code.")
+    for key, n in sorted(stats["responses"].items()):
+        method, route, status = key.split("\t")
+        lines.append(f"http_requests_total{{{_prom_labels(method=method, route=route, status=status)}}} {n}")
+
+    family("http_request_duration_seconds", "histogram", "Time from request start to last response byte.")
+    for key, state in sorted(stats["latency"].items()):
+        method, route = key.split("\t")
+        lines.extend(_render_histogram(
+            "http_request_duration_seconds", _prom_labels(method=method, route=route), LATENCY_BUCKETS, state
+        ))
+
+    family("http_response_size_bytes", "histogram", "Response body size, including streamed bodies.")
+    for key, state in sorted(stats["size"].items()):
+        method, route = key.split("\t")
+        lines.extend(_render_histogram(
+            "http_response_size_bytes", _prom_labels(method=method, route=route), SIZE_BUCKETS, state
+        ))
+
+    family("http_requests_in_flight", "gauge", "Requests currently being handled, by route class.")
+    for route_class, n in sorted(stats["in_flight"].items()):
+        lines.append(f"http_requests_in_flight{{{_prom_labels(route_class=route_class)}}} {n}")
+
+
+    family("executor_pending", "gauge", "Calls queued or running on each dedicated executor.")
+    for name, e in stats["executors"].items():
+        lines.append(f"executor_pending{{{_prom_labels(executor=name)}}} {e['pending']}")
+    family("executor_threads", "gauge", "Worker threads per dedicated executor.")
+    for name, e in stats["executors"].items():
+        lines.append(f"executor_threads{{{_prom_labels(executor=name)}}} {e['threads']}")
+    family("executor_wait_seconds", "histogram", "Time calls spend queued before a dedicated executor thread picks them up.")
+    for name, e in stats["executors"].items():
+        lines.extend(_render_histogram("executor_wait_seconds", _prom_labels(executor=name), LATENCY_BUCKETS, e["wait"]))
+
+    family("admission_queue_waiting", "gauge", "Requests queued for a route-class concurrency slot.")
+    for name, a in stats["admission"].items():
+        lines.append(f"admission_queue_waiting{{{_prom_labels(route_class=name)}}} {a['waiting']}")
+    family("admission_rejected_total", "counter", "Requests shed because the route-class queue was full or timed out.")
+    for name, a in stats["admission"].items():
+        lines.append(f"admission_rejected_total{{{_prom_labels(route_class=name)}}} {a['rejected']}")
+
+    for name, n in stats["counters"].items():
+        family(name, "counter", _COUNTER_HELP[name])
+        lines.append(f"{name} {n}")
+    for name, n in stats["gauges"].items():
+        family(name, "gauge", _GAUGE_HELP[name])
+        lines.append(f"{name} {n}")
+
+    if _metrics_snapshot:
+        family("host_cpu_percent", "gauge", "Host CPU utilisation from the last sample.")
+        lines.append(f"host_cpu_percent {_metrics_snapshot['cpu']['percent']}")
+        family("host_memory_percent", "gauge", "Host memory utilisation from the last sample.")
+        lines.append(f"host_memory_percent {_metrics_snapshot['memory']['percent']}")
+
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(_render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/v1/system/slow-requests", tags=["System"], include_in_schema=False)
+async def slow_requests(request: Request, limit: int = Query(20, ge=1, le=100)):
+    """
+    Most recent requests slower than SLOW_REQUEST_MS, with sampled stacks.
+    Stacks name internal files and lines, so only local callers get them:
+    nginx denies other clients and direct hits on the uvicorn port get a 404.
+    """
+    _require_local_caller(request)
+    if not telemetry.slow.enabled:
+        return {"enabled": False, "threshold_ms": 0, "requests": []}
+    return {
+        "enabled": True,
+        "threshold_ms": SLOW_REQUEST_MS,
+        "requests": list(reversed(telemetry.slow.records))[:limit],
+    }
 
 
 # ─────────────────────────── AI / NLP ───────────────────────────
@@ -165,17 +1645,108 @@ STOP_WORDS = {
 }
 
 
-@app.post("/api/v1/ai/sentiment", tags=["AI"])
-def analyze_sentiment(input: TextInput):
+WORD_RE = re.compile(r"\b[a-zA-Z]{3,}\b")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+MIN_SENTENCE_CHARS = 15
+
+
+MAX_SENTENCE_CHARS = 64 * 1024
+
+
+def _iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
     """
-    Analyze sentiment of text using TextBlob NLP.
-    Returns polarity (-1 to 1), subjectivity (0 to 1), and label.
+    Split a stream of text chunks into stripped sentences, carrying partial
+    ones over. Only newly appended text is searched for a boundary, and a
+    run longer than MAX_SENTENCE_CHARS is cut at its last space, so input
+    without sentence punctuation stays linear in time and bounded in memory.
     """
-    from textblob import TextBlob
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk
+        start = 0
+        # The carry holds no boundary; back up one char for a "." it ends with.
+        for match in SENTENCE_END_RE.finditer(text, max(len(carry) - 1, 0)):
+            yield text[start:match.start()].strip()
+            start = match.end()
+        carry = text[start:]
+        while len(carry) > MAX_SENTENCE_CHARS:
+            cut = carry.rfind(" ", 0, MAX_SENTENCE_CHARS)
+            if cut <= 0:
+                cut = MAX_SENTENCE_CHARS
+            yield carry[:cut].strip()
+            carry = carry[cut:]
+    if carry.strip():
+        yield carry.strip()
+
+
+# ── Shared tokenization ──
+# Every analysis works from one ParsedText, so a request that asks for
+# sentiment, keywords and a summary tokenizes the input a single time.
+
+class ParsedText:
+    """Input split once into sentences and lowercase words."""
+
+    __slots__ = ("text", "sentences", "words", "freq")
+
+    def __init__(self, text: str):
+        self.text = text
+        # (sentence, words) for every sentence, including short ones
+        self.sentences: list[tuple[str, list[str]]] = [
+            (sentence, WORD_RE.findall(sentence.lower())) for sentence in _iter_sentences([text])
+        ]
+        self.words = [w for _, words in self.sentences for w in words]
+        # stop-word-filtered term frequencies
+        self.freq = Counter(w for w in self.words if w not in STOP_WORDS)
+
+
+class NLPEngine:
+    """
+    TextBlob's pattern sentiment analyzer, loaded once and warmed up in
+    lifespan so the first request doesn't pay for the lexicon load.
+    """
+
+    WARMUP_TEXT = "The deploy went great, although the first build was painfully slow."
+
+    def __init__(self):
+        self._analyzer = None
+        self._lock = threading.Lock()
+        self.cold_start_ms: float | None = None
+        self.warm_ms: float | None = None
+
+    def load(self):
+        with self._lock:
+            if self._analyzer is not None:
+                return
+            start = time.perf_counter()
+            from textblob.en.sentiments import PatternAnalyzer
+
+            analyzer = PatternAnalyzer()
+            analyzer.analyze(self.WARMUP_TEXT)  # first call loads the lexicon
+            self.cold_start_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            analyzer.analyze(self.WARMUP_TEXT)
+            self.warm_ms = (time.perf_counter() - start) * 1000
+            self._analyzer = analyzer
+
+        log.info(
+            "NLP engine ready: cold start %.1f ms, warm inference %.2f ms",
+            self.cold_start_ms, self.warm_ms,
+        )
+
+    def sentiment(self, text: str) -> tuple[float, float]:
+        """Return (polarity, subjectivity), running the analyzer once."""
+        if self._analyzer is None:
+            self.load()
+        result = self._analyzer.analyze(text)
+        return result.polarity, result.subjectivity
+
+
+nlp_engine = NLPEngine()
 
-    blob = TextBlob(input.text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
+
+def _sentiment(doc: ParsedText) -> dict:
+    polarity, subjectivity = nlp_engine.sentiment(doc.text)
 
     if polarity > 0.1:
         label = "positive"
@@ -193,125 +1764,894 @@ def analyze_sentiment(input: TextInput):
         "polarity": round(polarity, 4),
         "subjectivity": round(subjectivity, 4),
         "confidence": round(min(abs(polarity) * 2, 1.0), 4),
-        "word_count": len(input.text.split()),
+        "word_count": len(doc.text.split()),
     }
 
 
-@app.post("/api/v1/ai/keywords", tags=["AI"])
-def extract_keywords(input: TextInput):
-    """
-    Extract keywords using TF-based scoring with stop-word filtering.
-    Returns the top 10 keywords ranked by frequency.
-    """
-    words = re.findall(r"\b[a-zA-Z]{3,}\b", input.text.lower())
-    filtered = [w for w in words if w not in STOP_WORDS]
+# ── Keyword index ──
+# Document frequencies for unigrams, bigrams and trigrams, learned from the
+# texts that pass through the AI and contact endpoints. Terms are interned
+# into a vocabulary dict (term -> id) and counts live in a flat array, so a
+# lookup is one dict probe per n-gram regardless of how many documents
+# have been indexed.
 
-    if not filtered:
-        return {"keywords": [], "total_words": len(words), "unique_words": 0}
-
-    freq = Counter(filtered)
-    top = freq.most_common(10)
-    max_count = top[0][1] if top else 1
+KEYWORD_INDEX_PATH = os.environ.get(
+    "KEYWORD_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "keyword_index.idx")
+)
+KEYWORD_INDEX_MAX_TERMS = int(os.environ.get("KEYWORD_INDEX_MAX_TERMS", "1000000"))
+KEYWORD_CHECKPOINT_INTERVAL = 300
+MAX_NGRAM = 3
+
+
+def _ngrams(words: list[str]) -> Iterator[str]:
+    """Yield unigrams, bigrams and trigrams that contain no stop words."""
+    for i in range(len(words)):
+        for n in range(1, MAX_NGRAM + 1):
+            gram = words[i:i + n]
+            if len(gram) < n or gram[-1] in STOP_WORDS:
+                break
+            yield " ".join(gram) if n > 1 else gram[0]
+
+
+class KeywordIndex:
+    """Incremental document-frequency index with on-disk checkpoints."""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: str | None, max_terms: int):
+        self.path = path
+        self.max_terms = max_terms
+        self.terms: list[str] = []
+        # (term -> id, document frequency by id). idf() reads it without the
+        # lock, so a load or merge swaps in a new pair with one assignment,
+        # and observe() grows df before it adds an id to the vocabulary.
+        self.table: tuple[dict[str, int], array] = ({}, array("L"))
+        self.n_docs = 0
+        self.dirty = False
+        self._recent: OrderedDict[bytes, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._base = self._snapshot()  # counts as of the last load or save
+
+    def observe(self, words: list[str]):
+        """Count one document's distinct n-grams. Repeats of recent texts are skipped."""
+        digest = hashlib.blake2b(" ".join(words).encode(), digest_size=8).digest()
+        with self._lock:
+            if digest in self._recent:
+                return
+            self._recent[digest] = None
+            if len(self._recent) > 4096:
+                self._recent.popitem(last=False)
+
+            vocab, df = self.table
+            for term in set(_ngrams(words)):
+                term_id = vocab.get(term)
+                if term_id is None:
+                    if len(self.terms) >= self.max_terms:
+                        continue
+                    term_id = len(self.terms)
+                    term = sys.intern(term)
+                    self.terms.append(term)
+                    df.append(0)
+                    vocab[term] = term_id
+                df[term_id] += 1
+            self.n_docs += 1
+            self.dirty = True
+
+    def idf(self, term: str) -> float:
+        vocab, df = self.table
+        term_id = vocab.get(term)
+        count = df[term_id] if term_id is not None else 0
+        return math.log((1 + self.n_docs) / (1 + count)) + 1.0
+
+    def stats(self) -> dict:
+        return {"documents": self.n_docs, "terms": len(self.terms), "max_terms": self.max_terms}
+
+    def _snapshot(self) -> tuple[list[str], array, int]:
+        df = self.table[1]
+        return list(self.terms), array(df.typecode, df), self.n_docs
+
+    def _deltas(self, since: tuple[list[str], array, int]) -> tuple[dict[str, int], int]:
+        """Counts this process added since `since` was taken, keyed by term. Call with the lock held."""
+        _, base_df, base_docs = since
+        deltas = {}
+        for term_id, count in enumerate(self.table[1]):
+            delta = count - (base_df[term_id] if term_id < len(base_df) else 0)
+            if delta:
+                deltas[self.terms[term_id]] = delta
+        return deltas, self.n_docs - base_docs
+
+    def _adopt(self, terms: list[str], df: array, n_docs: int):
+        """Replace the counts. Call with the lock held."""
+        self.terms = [sys.intern(t) for t in terms]
+        self.table = ({t: i for i, t in enumerate(self.terms)}, df)
+        self.n_docs = n_docs
+
+    def _merge(self, terms: list[str], df: array, n_docs: int, deltas: dict[str, int], new_docs: int):
+        vocab = {t: i for i, t in enumerate(terms)}
+        for term, delta in deltas.items():
+            term_id = vocab.get(term)
+            if term_id is None:
+                if len(terms) >= self.max_terms:
+                    continue
+                term_id = vocab[term] = len(terms)
+                terms.append(term)
+                df.append(0)
+            df[term_id] += delta
+        return terms, df, n_docs + new_docs
+
+    def save(self):
+        """
+        Fold this worker's counts into the checkpoint. Several workers share
+        one file, so each adds only what it observed since its last load or
+        save to whatever is on disk, under an exclusive lock, then adopts the
+        merged totals.
+        """
+        if not self.path:
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            with self._lock:
+                taken = self._snapshot()
+                deltas, new_docs = self._deltas(self._base)
+                self.dirty = False
+            on_disk = self._read() or ([], array("L"), 0)
+            terms, df, n_docs = self._merge(*on_disk, deltas, new_docs)
+            self._write(terms, df, n_docs)
+        with self._lock:
+            # Keep anything observed while the file was being written.
+            deltas, new_docs = self._deltas(taken)
+            self._adopt(*self._merge(terms, array(df.typecode, df), n_docs, deltas, new_docs))
+            self._base = (terms, df, n_docs)
+
+    def _write(self, terms: list[str], df: array, n_docs: int):
+        """Atomically write header, newline-joined vocabulary and raw df array."""
+        header = {"version": self.FORMAT_VERSION, "n_docs": n_docs, "terms": len(terms), "itemsize": df.itemsize}
+        vocab = "\n".join(terms).encode()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(len(vocab).to_bytes(8, "little"))
+            f.write(vocab)
+            f.write(df.tobytes())
+        os.replace(tmp, self.path)
+
+    def _read(self) -> tuple[list[str], array, int] | None:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["version"] != self.FORMAT_VERSION:
+                    return None
+                vocab_len = int.from_bytes(f.read(8), "little")
+                terms = f.read(vocab_len).decode().split("\n") if header["terms"] else []
+                df = array("L")
+                if df.itemsize != header["itemsize"]:
+                    return None
+                df.frombytes(f.read(header["terms"] * df.itemsize))
+        except (OSError, ValueError, KeyError):
+            log.warning("Keyword index checkpoint %s is unreadable, starting empty", self.path)
+            return None
+        if len(terms) != len(df):
+            return None
+        return terms, df, header["n_docs"]
+
+    def load(self):
+        if not self.path:
+            return
+        checkpoint = self._read()
+        if checkpoint is None:
+            return
+        with self._lock:
+            self._adopt(*checkpoint)
+            self._base = self._snapshot()
+            self.dirty = False
+
+
+keyword_index = KeywordIndex(KEYWORD_INDEX_PATH or None, KEYWORD_INDEX_MAX_TERMS)
+
+
+def _observe_text(text: str):
+    keyword_index.observe(WORD_RE.findall(text.lower()))
+
+
+def _observe_texts(texts: Iterable[str]):
+    for text in texts:
+        _observe_text(text)
+
+
+async def _keyword_index_checkpointer():
+    while True:
+        await asyncio.sleep(KEYWORD_CHECKPOINT_INTERVAL)
+        if keyword_index.dirty:
+            try:
+                await blocking_executor.run(keyword_index.save)
+            except OSError as e:
+                log.warning("Keyword index checkpoint failed: %s", e)
+
+
+def _keywords(doc: ParsedText) -> dict:
+    if not doc.freq:
+        return {"keywords": [], "total_words": len(doc.words), "unique_words": 0}
+
+    counts = Counter(_ngrams(doc.words))
+    # Phrases only count as keywords when they repeat within the text.
+    # Ties go to the longer phrase so it is selected before its parts, then
+    # to the term seen first (Counter keeps first-occurrence order).
+    scored = [
+        (count * keyword_index.idf(term), term.count(" "), -position, term, count)
+        for position, (term, count) in enumerate(counts.items())
+        if count > 1 or " " not in term
+    ]
+    top: list[tuple[float, str, int]] = []
+    for score, _, _, term, count in heapq.nlargest(40, scored):
+        # Skip words already covered by a selected phrase that occurs as often.
+        if any(count <= c and f" {term} " in f" {t} " for _, t, c in top):
+            continue
+        top.append((score, term, count))
+        if len(top) == 10:
+            break
+    max_score = top[0][0]
 
     return {
         "keywords": [
-            {"word": w, "count": c, "relevance": round(c / max_count, 4)}
-            for w, c in top
+            {"word": term, "count": count, "score": round(score, 4), "relevance": round(score / max_score, 4)}
+            for score, term, count in top
         ],
-        "total_words": len(words),
-        "unique_words": len(set(filtered)),
+        "total_words": len(doc.words),
+        "unique_words": len(doc.freq),
     }
 
 
-@app.post("/api/v1/ai/summarize", tags=["AI"])
-def summarize_text(input: TextInput):
-    """
-    Extractive text summarization using sentence scoring.
-    Selects the most informative sentences based on word frequency.
-    """
-    sentences = re.split(r"(?<=[.!?])\s+", input.text)
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 15]
+def _sentence_score(words: list[str], freq: Counter, index: int, total: int) -> float:
+    score = sum(freq.get(w, 0) for w in words) / max(len(words), 1)
+    # Boost earlier sentences slightly
+    return score * (1.0 + 0.1 * (1 - index / total))
+
+
+def _summary_size(total: int, ratio: float, max_sentences: int | None) -> int:
+    top_n = max(1, int(total * ratio + 1e-9))  # epsilon keeps 57 * (1/3) at 19
+    return min(top_n, max_sentences) if max_sentences else top_n
+
+
+def _summarize(doc: ParsedText, ratio: float = 1 / 3, max_sentences: int | None = None) -> dict:
+    sentences = [(s, words) for s, words in doc.sentences if len(s) > MIN_SENTENCE_CHARS]
 
     if len(sentences) <= 2:
         return {
-            "summary": input.text.strip(),
+            "summary": doc.text.strip(),
             "sentences_original": len(sentences),
             "sentences_summary": len(sentences),
             "compression_ratio": 1.0,
         }
 
-    # Score by word frequency
-    words = re.findall(r"\b[a-zA-Z]{3,}\b", input.text.lower())
-    freq = Counter(w for w in words if w not in STOP_WORDS)
-
-    scored = []
-    for i, s in enumerate(sentences):
-        s_words = re.findall(r"\b[a-zA-Z]{3,}\b", s.lower())
-        score = sum(freq.get(w, 0) for w in s_words) / max(len(s_words), 1)
-        # Boost earlier sentences slightly
-        score *= 1.0 + 0.1 * (1 - i / len(sentences))
-        scored.append((score, s))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top_n = max(1, len(sentences) // 3)
-    # Preserve original order
-    selected = sorted(scored[:top_n], key=lambda x: sentences.index(x[1]))
-    summary = " ".join(s for _, s in selected)
+    total = len(sentences)
+    top_n = _summary_size(total, ratio, max_sentences)
+    # (score, -index) ranks ties towards earlier sentences; sorting the chosen
+    # indices restores document order without any list.index() lookups.
+    best = heapq.nlargest(
+        top_n,
+        ((_sentence_score(words, doc.freq, i, total), -i) for i, (_, words) in enumerate(sentences)),
+    )
+    summary = " ".join(sentences[-neg_i][0] for _, neg_i in sorted(best, key=lambda x: -x[1]))
 
     return {
         "summary": summary,
-        "sentences_original": len(sentences),
+        "sentences_original": total,
         "sentences_summary": top_n,
-        "compression_ratio": round(top_n / len(sentences), 2),
+        "compression_ratio": round(top_n / total, 2),
+    }
+
+
+def _read_text_chunks(file: IO[bytes], size: int = 64 * 1024) -> Iterator[str]:
+    file.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while chunk := file.read(size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _summarize_stream(file: IO[bytes], ratio: float, max_sentences: int | None) -> dict:
+    """
+    Two streaming passes over a spooled document: the first builds word
+    frequencies, the second keeps only the top-k sentences in a min-heap.
+    Memory is bounded by the vocabulary plus k sentences, not document size.
+    """
+    freq: Counter = Counter()
+    total = 0
+    for sentence in _iter_sentences(_read_text_chunks(file)):
+        freq.update(w for w in WORD_RE.findall(sentence.lower()) if w not in STOP_WORDS)
+        if len(sentence) > MIN_SENTENCE_CHARS:
+            total += 1
+
+    if total == 0:
+        return {"summary": "", "sentences_original": 0, "sentences_summary": 0, "compression_ratio": 1.0}
+
+    top_n = _summary_size(total, ratio, max_sentences)
+    heap: list[tuple[float, int, str]] = []
+    index = 0
+    for sentence in _iter_sentences(_read_text_chunks(file)):
+        if len(sentence) <= MIN_SENTENCE_CHARS:
+            continue
+        item = (_sentence_score(WORD_RE.findall(sentence.lower()), freq, index, total), -index, sentence)
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+        index += 1
+
+    selected = sorted(heap, key=lambda x: -x[1])
+    return {
+        "summary": " ".join(s for _, _, s in selected),
+        "sentences_original": total,
+        "sentences_summary": len(selected),
+        "compression_ratio": round(len(selected) / total, 2),
+    }
+
+
+AI_OPERATIONS = {
+    "sentiment": _sentiment,
+    "keywords": _keywords,
+    "summarize": _summarize,
+}
+
+
+# ── Result cache ──
+# Results are keyed by a hash of (operation, normalized text). The key doubles
+# as the ETag, so a client that already holds a result gets a bodyless 304.
+# An optional SQLite tier keeps entries across service restarts.
+
+AI_CACHE_VERSION = "4"  # bump when an analysis changes its output
+AI_CACHE_SIZE = int(os.environ.get("AI_CACHE_SIZE", "2048"))
+AI_CACHE_TTL = float(os.environ.get("AI_CACHE_TTL", "86400"))
+AI_CACHE_DB = os.environ.get(
+    "AI_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_cache.db")
+)
+
+
+# The SQLite tier is shared by all workers, each of which keeps its own
+# in-memory LRU in front of it. It is opened and pruned at startup with a
+# generous busy timeout (workers restart together after a deploy); lookups
+# and writes on the request path then use a short one, since the cache is
+# best-effort and recomputing beats waiting on another worker's lock.
+AI_CACHE_OPEN_TIMEOUT_MS = 10000
+AI_CACHE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=100",
+)
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL and an optional SQLite tier."""
+
+    def __init__(self, maxsize: int, ttl: float, db_path: str | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.disk_hits = 0
+        self._db = None
+
+    def open(self):
+        """
+        Attach the SQLite tier and drop expired rows. Called from the lifespan,
+        not at import, so batch and regex subprocesses never open the file.
+        If the file stays locked the tier is skipped or left unpruned rather
+        than failing startup.
+        """
+        if not self.db_path or self._db is not None:
+            return
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            db.execute(f"PRAGMA busy_timeout={AI_CACHE_OPEN_TIMEOUT_MS}")
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        except sqlite3.OperationalError as e:
+            log.warning("AI cache database %s is unavailable, caching in memory only: %s", self.db_path, e)
+            db.close()
+            return
+        try:
+            with db:
+                db.execute("DELETE FROM ai_cache WHERE expires_at < ?", (time.time(),))
+        except sqlite3.OperationalError as e:
+            log.warning("Skipped pruning expired AI cache rows: %s", e)
+        for pragma in AI_CACHE_PRAGMAS:
+            db.execute(pragma)
+        self._db = db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM ai_cache WHERE key = ? AND expires_at > ?", (key, now)
+                    ).fetchone()
+                except sqlite3.OperationalError:
+                    row = None  # another worker holds the lock; recomputing is cheaper than waiting
+                if row:
+                    value = orjson.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                            (key, orjson.dumps(value), expires_at),
+                        )
+                except sqlite3.OperationalError:
+                    pass  # the entry still lives in this worker's memory tier
+
+    def _store(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "disk_tier": self._db is not None,
+            "disk_hits": self.disk_hits,
+        }
+
+
+ai_cache = ResultCache(AI_CACHE_SIZE, AI_CACHE_TTL, AI_CACHE_DB or None)
+
+
+def _ai_cache_key(operation: str, text: str) -> str:
+    normalized = " ".join(text.split())
+    payload = f"{AI_CACHE_VERSION}\0{operation}\0{normalized}".encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored on both sides."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates or "*" in candidates
+
+
+def _analyze(text: str, operations: list[str]) -> dict[str, dict]:
+    """Run the requested analyses over a single tokenization of `text`."""
+    doc = ParsedText(text)
+    return {op: AI_OPERATIONS[op](doc) for op in operations}
+
+
+def _cached_analyze(text: str, operations: list[str]) -> dict[str, dict]:
+    """Serve each operation from the cache, computing only the misses in one pass."""
+    keys = {op: _ai_cache_key(op, text) for op in operations}
+    results = {}
+    for op, key in keys.items():
+        cached = ai_cache.get(key)
+        if cached is not None:
+            results[op] = cached
+    missing = [op for op in operations if op not in results]
+    if missing:
+        doc = ParsedText(text)
+        keyword_index.observe(doc.words)
+        for op in missing:
+            results[op] = AI_OPERATIONS[op](doc)
+            ai_cache.set(keys[op], results[op])
+    return {op: results[op] for op in operations}
+
+
+async def _cached_analysis(operation: str, text: str, request: Request, response: Response):
+    key = _ai_cache_key(operation, text)
+    etag = f'"{key}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return (await nlp_executor.run(_cached_analyze, text, [operation]))[operation]
+
+
+@app.post("/api/v1/ai/analyze", tags=["AI"])
+async def analyze_text(input: AnalyzeInput, request: Request, response: Response):
+    """
+    Run any combination of sentiment, keywords and summarize over one shared
+    tokenization. The single-analysis endpoints are views over this pipeline.
+    """
+    operations = list(dict.fromkeys(input.operations))
+    etag = f'"{_ai_cache_key(",".join(sorted(operations)), input.text)}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return await nlp_executor.run(_cached_analyze, input.text, operations)
+
+
+@app.post("/api/v1/ai/sentiment", tags=["AI"])
+async def analyze_sentiment(input: TextInput, request: Request, response: Response):
+    """
+    Analyze sentiment of text using TextBlob NLP.
+    Returns polarity (-1 to 1), subjectivity (0 to 1), and label.
+    """
+    return await _cached_analysis("sentiment", input.text, request, response)
+
+
+@app.post("/api/v1/ai/keywords", tags=["AI"])
+async def extract_keywords(input: TextInput, request: Request, response: Response):
+    """
+    Extract keywords and repeated phrases (up to trigrams) ranked by TF-IDF
+    against the document frequencies seen so far.
+    """
+    return await _cached_analysis("keywords", input.text, request, response)
+
+
+@app.post("/api/v1/ai/summarize", tags=["AI"])
+async def summarize_text(input: TextInput, request: Request, response: Response):
+    """
+    Extractive text summarization using sentence scoring.
+    Selects the most informative sentences based on word frequency.
+    """
+    return await _cached_analysis("summarize", input.text, request, response)
+
+
+SUMMARIZE_MAX_BYTES = int(os.environ.get("SUMMARIZE_MAX_BYTES", str(20 * 1024 * 1024)))
+MAX_SUMMARY_SENTENCES = 500
+
+
+@app.post("/api/v1/ai/summarize/document", tags=["AI"])
+async def summarize_document(
+    request: Request,
+    ratio: float = Query(1 / 3, gt=0, le=1, description="Fraction of sentences to keep"),
+    sentences: int | None = Query(None, ge=1, le=MAX_SUMMARY_SENTENCES, description="Target summary length"),
+):
+    """
+    Summarize a large plain-text document sent as the raw request body
+    (e.g. `curl --data-binary @report.txt`). Up to SUMMARIZE_MAX_BYTES.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > SUMMARIZE_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Document too large")
+            await _spool_write(spool, chunk, received)
+        if received == 0:
+            raise HTTPException(status_code=400, detail="Empty document")
+
+        result = await nlp_executor.run(
+            _summarize_stream, spool, ratio, min(sentences or MAX_SUMMARY_SENTENCES, MAX_SUMMARY_SENTENCES)
+        )
+    finally:
+        spool.close()
+
+    return {**result, "bytes": received}
+
+
+@app.get("/api/v1/ai/cache", tags=["AI"])
+async def ai_cache_stats():
+    """Hit/miss/eviction counters for the AI result cache and keyword index size."""
+    return {**ai_cache.stats(), "keyword_index": keyword_index.stats()}
+
+
+# ── Batch ──
+# Batches are split into chunks and fanned out to a process pool; each worker
+# warms its own NLPEngine once. Small batches skip the IPC round trip. A worker
+# that dies breaks the whole pool, so a broken pool is dropped and rebuilt.
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_INLINE_MAX = 16
+_batch_pool: ProcessPoolExecutor | None = None
+
+
+def _batch_worker_init():
+    nlp_engine.load()
+    keyword_index.load()
+
+
+def _run_batch_chunk(texts: list[str], operations: list[str]) -> list[dict]:
+    return [_analyze(text, operations) for text in texts]
+
+
+def _get_batch_pool() -> ProcessPoolExecutor:
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = ProcessPoolExecutor(
+            max_workers=BATCH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_batch_worker_init,
+        )
+    return _batch_pool
+
+
+def _discard_batch_pool(pool: ProcessPoolExecutor):
+    global _batch_pool
+    if _batch_pool is pool:  # a concurrent request may already have replaced it
+        _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_batch_pooled(chunks: list[list[str]], operations: list[str]) -> list[list[dict]]:
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = _get_batch_pool()
+        try:
+            return await asyncio.gather(*(
+                loop.run_in_executor(pool, _run_batch_chunk, chunk, operations)
+                for chunk in chunks
+            ))
+        except BrokenProcessPool:
+            log.warning("Batch worker pool broke; rebuilding it (attempt %d)", attempt + 1)
+            _discard_batch_pool(pool)
+    raise HTTPException(status_code=503, detail="Batch workers are unavailable")
+
+
+@app.post("/api/v1/ai/batch", tags=["AI"])
+async def analyze_batch(input: BatchInput):
+    """
+    Run sentiment, keywords and/or summarize over up to 1,000 texts.
+    Results are returned in input order.
+    """
+    start = time.perf_counter()
+    operations = list(dict.fromkeys(input.operations))
+
+    await nlp_executor.run(_observe_texts, input.texts)
+
+    if len(input.texts) <= BATCH_INLINE_MAX:
+        results = await nlp_executor.run(_run_batch_chunk, input.texts, operations)
+    else:
+        size = -(-len(input.texts) // (BATCH_WORKERS * 4))
+        chunks = [input.texts[i:i + size] for i in range(0, len(input.texts), size)]
+        parts = await _run_batch_pooled(chunks, operations)
+        results = [r for part in parts for r in part]
+
+    return {
+        "results": results,
+        "count": len(results),
+        "operations": operations,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
     }
 
 
 # ─────────────────────────── PLAYGROUND ───────────────────────────
 
+HASH_ALGORITHMS = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+    "blake2b": hashlib.blake2b,
+}
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
 @app.post("/api/v1/playground/hash", tags=["Playground"])
-def hash_text(input: HashInput):
-    """Hash text with MD5, SHA-1, SHA-256, or SHA-512."""
-    algos = {
-        "md5": hashlib.md5,
-        "sha1": hashlib.sha1,
-        "sha256": hashlib.sha256,
-        "sha512": hashlib.sha512,
-    }
-    h = algos[input.algorithm](input.text.encode()).hexdigest()
+async def hash_text(input: HashInput):
+    """Hash text with MD5, SHA-1, SHA-256, SHA-512 or BLAKE2b."""
+    data = input.text.encode()
+    h = HASH_ALGORITHMS[input.algorithm](data).hexdigest()
     return {
         "hash": h,
         "algorithm": input.algorithm,
         "length": len(h),
-        "input_bytes": len(input.text.encode()),
+        "input_bytes": len(data),
+    }
+
+
+def _update_digests(digests: list, block: bytes):
+    # hashlib drops the GIL for buffers over 2 KB, so this runs in parallel
+    # with the event loop reading the next block.
+    for digest in digests:
+        digest.update(block)
+
+
+@app.post("/api/v1/playground/hash/stream", tags=["Playground"])
+async def hash_stream(
+    request: Request,
+    algorithms: list[Literal["md5", "sha1", "sha256", "sha512", "blake2b"]] = Query(["sha256"]),
+):
+    """
+    Hash a raw request body of any size with several algorithms in one pass
+    (e.g. `curl --data-binary @disk.img '...?algorithms=md5&algorithms=sha256'`).
+    Reads 1 MB blocks; hashing of one block overlaps with receiving the next.
+    """
+    names = list(dict.fromkeys(algorithms))
+    digests = [HASH_ALGORITHMS[name]() for name in names]
+    start = time.perf_counter()
+    total = 0
+    pending: asyncio.Future | None = None
+    parts: list[bytes] = []
+    size = 0
+
+    async for chunk in request.stream():
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= HASH_BLOCK_SIZE:
+            block = b"".join(parts)
+            parts, size = [], 0
+            if pending is not None:
+                await pending
+            pending = asyncio.ensure_future(blocking_executor.run(_update_digests, digests, block))
+            total += len(block)
+    if pending is not None:
+        await pending
+    if parts:
+        block = b"".join(parts)
+        await blocking_executor.run(_update_digests, digests, block)
+        total += len(block)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "digests": {name: d.hexdigest() for name, d in zip(names, digests)},
+        "input_bytes": total,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "throughput_mb_s": round(total / (1024**2) / elapsed, 1) if elapsed > 0 else None,
     }
 
 
 @app.post("/api/v1/playground/base64", tags=["Playground"])
-def base64_convert(input: Base64Input):
-    """Encode or decode Base64 strings."""
+async def base64_convert(input: Base64Input):
+    """Encode or decode Base64 strings (standard or URL-safe alphabet)."""
+    altchars = b"-_" if input.alphabet == "urlsafe" else None
     if input.action == "encode":
-        result = base64.b64encode(input.text.encode()).decode()
+        result = base64.b64encode(input.text.encode(), altchars).decode()
     else:
         try:
-            result = base64.b64decode(input.text.encode()).decode()
-        except Exception:
+            decoded = base64.b64decode(input.text.encode(), altchars)
+        except (binascii.Error, ValueError):
             raise HTTPException(status_code=400, detail="Invalid base64 string")
+        try:
+            result = decoded.decode()
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=400,
+                detail="Decoded data is binary, not UTF-8 text; use /api/v1/playground/base64/stream",
+            )
+
+    return {"result": result, "action": input.action, "alphabet": input.alphabet}
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request stream itself.
+    Starlette's default disconnect listener would compete for the same
+    receive() channel and swallow request body messages, so it is skipped;
+    a disconnect surfaces as ClientDisconnect from request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+_B64_WHITESPACE = b" \t\r\n"
+
+
+async def _b64_encode_stream(chunks: AsyncIterator[bytes], altchars: bytes | None) -> AsyncIterator[bytes]:
+    """Encode 3-byte-aligned slices of each chunk; at most 2 bytes carry over."""
+    carry = b""
+    async for chunk in chunks:
+        view = memoryview(chunk)
+        if carry:
+            need = 3 - len(carry)
+            carry += bytes(view[:need])
+            view = view[need:]
+            if len(carry) < 3:
+                continue
+            yield base64.b64encode(carry, altchars)
+            carry = b""
+        cut = len(view) - len(view) % 3
+        if cut:
+            yield base64.b64encode(view[:cut], altchars)
+        carry = bytes(view[cut:])
+    if carry:
+        yield base64.b64encode(carry, altchars)
+
+
+async def _b64_decode_stream(chunks: AsyncIterator[bytes], altchars: bytes | None) -> AsyncIterator[bytes]:
+    """Decode 4-character-aligned slices of each chunk; at most 3 characters carry over."""
+    carry = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        data = chunk.translate(None, _B64_WHITESPACE)
+        view = memoryview(data)
+        if carry:
+            need = 4 - len(carry)
+            carry += bytes(view[:need])
+            view = view[need:]
+            if len(carry) < 4:
+                continue
+            yield base64.b64decode(carry, altchars, validate=True)
+            carry = b""
+        cut = len(view) - len(view) % 4
+        if cut:
+            yield base64.b64decode(view[:cut], altchars, validate=True)
+        carry = bytes(view[cut:])
+    if carry:
+        # Unpadded input (common with the URL-safe alphabet): restore padding.
+        yield base64.b64decode(carry + b"=" * (-len(carry) % 4), altchars, validate=True)
+
+
+@app.post("/api/v1/playground/base64/stream", tags=["Playground"])
+async def base64_stream(
+    request: Request,
+    action: Literal["encode", "decode"] = "encode",
+    alphabet: Literal["standard", "urlsafe"] = "standard",
+):
+    """
+    Stream a raw request body through Base64 encoding or decoding.
+    Encoding returns text/plain; decoding returns the raw bytes as an octet stream.
+    """
+    altchars = b"-_" if alphabet == "urlsafe" else None
+    if action == "encode":
+        return DuplexStreamingResponse(_b64_encode_stream(request.stream(), altchars), media_type="text/plain")
+
+    body = _b64_decode_stream(request.stream(), altchars)
+    # Decode the first block before committing to a 200 so malformed input
+    # still gets a proper 400; later errors can only abort the stream.
+    try:
+        first = await anext(body, b"")
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid base64 data")
+
+    async def content():
+        yield first
+        async for part in body:
+            yield part
 
-    return {"result": result, "action": input.action}
+    return DuplexStreamingResponse(
+        content(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="decoded.bin"'},
+    )
 
 
 @app.get("/api/v1/playground/headers", tags=["Playground"])
-def get_request_headers(request: Request):
+async def get_request_headers(request: Request):
     """Returns all HTTP headers from the incoming request."""
-    return {
+    return FastJSONResponse({
         "headers": dict(request.headers),
         "method": request.method,
         "url": str(request.url),
-    }
+    })
 
 
 @app.get("/api/v1/playground/ip", tags=["Playground"])
-def get_client_ip(request: Request):
+async def get_client_ip(request: Request):
     """Returns the client's IP address and request metadata."""
     forwarded = request.headers.get("x-forwarded-for")
     ip = forwarded.split(",")[0].strip() if forwarded else request.client.host
@@ -322,35 +2662,338 @@ def get_client_ip(request: Request):
     }
 
 
+JSON_CSV_MAX_BYTES = int(os.environ.get("JSON_CSV_MAX_BYTES", str(200 * 1024 * 1024)))
+JSON_CSV_MAX_COLUMNS = 1000
+JSON_MAX_RECORD_CHARS = 1024 * 1024
+JSON_WHITESPACE = " \t\r\n"
+# What raw_decode can leave unparsed at a failure that more input may fix:
+# a literal or number cut off at the end of the buffer.
+_JSON_PARTIAL_TOKEN = re.compile(r"(?:t(?:ru?)?|f(?:a(?:ls?)?)?|n(?:ul?)?|-|\.|[eE][-+]?)?")
+
+
+def _csv_cell(value) -> str:
+    """Strings as-is, null as an empty cell, everything else in its JSON form (true, not True)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _collect_columns(records: Iterable[dict]) -> tuple[list[str], int]:
+    """Union of keys in first-seen order, capped at JSON_CSV_MAX_COLUMNS."""
+    columns: dict[str, None] = {}
+    count = 0
+    for record in records:
+        count += 1
+        for key in record:
+            if key not in columns:
+                if len(columns) >= JSON_CSV_MAX_COLUMNS:
+                    raise ValueError(f"More than {JSON_CSV_MAX_COLUMNS} distinct columns")
+                columns[key] = None
+    return list(columns), count
+
+
+def _json_truncated(buf: str, error: json.JSONDecodeError) -> bool:
+    """True if the decode failed only because the record runs past the end of buf."""
+    if error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(buf) - error.pos < 6
+    return _JSON_PARTIAL_TOKEN.fullmatch(buf, error.pos) is not None
+
+
+def _iter_json_records(chunks: Iterable[str]) -> Iterator[dict]:
+    """
+    Incrementally parse a JSON array of objects or NDJSON from text chunks.
+    Only the record being decoded is buffered, never the whole document.
+    Array elements take exactly one comma between them; NDJSON records are
+    separated by newlines.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buf, pos = "", 0
+    offset, line = 0, 1  # document position and line number of buf[0]
+    in_array = None  # unknown until the first significant character
+    # array: "first" (after "["), "value" (after ","), "next" (after a record), "done"
+    # NDJSON: "value", "newline" (after a record, until a line break)
+    state = "value"
+
+    def where(at: int) -> str:
+        return f"(line {line + buf.count(chr(10), 0, at)}, char {offset + at})"
+
+    while True:
+        while pos < len(buf) and buf[pos] in JSON_WHITESPACE:
+            if buf[pos] == "\n" and state == "newline":
+                state = "value"
+            pos += 1
+        if pos == len(buf):
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            line += buf.count("\n")
+            offset += len(buf)
+            buf, pos = chunk, 0
+            continue
+
+        char = buf[pos]
+        if in_array is None:
+            in_array = char == "["
+            if in_array:
+                state = "first"
+                pos += 1
+                continue
+        if state == "done":
+            raise ValueError(f"Unexpected data after the closing ] {where(pos)}")
+        if in_array and char == "]" and state in ("first", "next"):
+            state = "done"
+            pos += 1
+            continue
+        if in_array and char == "," and state == "next":
+            state = "value"
+            pos += 1
+            continue
+        if state == "next":
+            raise ValueError(f"Expected ',' or ']' after a record {where(pos)}")
+        if state == "newline":
+            raise ValueError(f"NDJSON records must be on separate lines {where(pos)}")
+
+        try:
+            record, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            chunk = next(chunks, None) if _json_truncated(buf, e) else None
+            if chunk is None:
+                raise ValueError(f"Invalid JSON: {e.msg} {where(e.pos)}")
+            if len(buf) - pos > JSON_MAX_RECORD_CHARS:
+                raise ValueError("A single record exceeds 1 MB")
+            # The record continues in the next chunk.
+            line += buf.count("\n", 0, pos)
+            offset += pos
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        if not isinstance(record, dict):
+            raise ValueError("Each record must be a JSON object")
+        state = "next" if in_array else "newline"
+        yield record
+
+    if in_array and state != "done":
+        raise ValueError("Unterminated JSON array")
+
+
+def _stream_csv(file: IO[bytes], columns: list[str]) -> Iterator[bytes]:
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for record in _iter_json_records(_read_text_chunks(file)):
+            writer.writerow([_csv_cell(record.get(c)) for c in columns])
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+    finally:
+        file.close()
+
+
+def _records_to_csv(records: list[dict]) -> tuple[str, int]:
+    headers, _ = _collect_columns(records)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for item in records:
+        writer.writerow([_csv_cell(item.get(h)) for h in headers])
+    return buffer.getvalue().removesuffix("\r\n"), len(headers)
+
+
 @app.post("/api/v1/playground/json-to-csv", tags=["Playground"])
-def json_to_csv(input: JSONToCSVInput):
+async def json_to_csv(input: JSONToCSVInput):
     """Convert a JSON array of objects to CSV format."""
     if not input.data:
         raise HTTPException(status_code=400, detail="Empty data array")
 
-    headers = list(input.data[0].keys())
-    rows = [",".join(headers)]
-    for item in input.data:
-        rows.append(",".join(str(item.get(h, "")) for h in headers))
+    try:
+        text, columns = await blocking_executor.run(_records_to_csv, input.data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return {
-        "csv": "\n".join(rows),
+    return FastJSONResponse({
+        "csv": text,
         "rows": len(input.data),
-        "columns": len(headers),
-    }
+        "columns": columns,
+    })
 
 
-@app.post("/api/v1/playground/regex-test", tags=["Playground"])
-def regex_test(pattern: str, text: str):
-    """Test a regex pattern against text and return matches."""
+@app.post("/api/v1/playground/json-to-csv/stream", tags=["Playground"])
+async def json_to_csv_stream(request: Request):
+    """
+    Convert a large JSON array or NDJSON request body to CSV, streamed back.
+    The body is spooled to disk, scanned once for the column set, then
+    parsed again while CSV rows are written out.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
     try:
-        matches = re.findall(pattern, text)
-        return {
-            "pattern": pattern,
-            "matches": matches[:50],
-            "count": len(matches),
-            "valid_pattern": True,
-        }
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > JSON_CSV_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Input too large")
+            await _spool_write(spool, chunk, received)
+
+        try:
+            columns, rows = await blocking_executor.run(
+                lambda: _collect_columns(_iter_json_records(_read_text_chunks(spool)))
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if rows == 0:
+            raise HTTPException(status_code=400, detail="No records found")
+    except BaseException:
+        spool.close()
+        raise
+
+    return StreamingResponse(
+        blocking_executor.iterate(_stream_csv(spool, columns)),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": 'attachment; filename="data.csv"',
+            "X-Rows": str(rows),
+            "X-Columns": str(len(columns)),
+        },
+    )
+
+
+# ── Regex sandbox ──
+# Patterns run in a few dedicated worker processes with a hard per-call
+# timeout. A worker stuck in catastrophic backtracking is killed and replaced
+# rather than pinning a CPU and an executor thread indefinitely.
+
+REGEX_WORKERS = int(os.environ.get("REGEX_WORKERS", "2"))
+REGEX_TIMEOUT = float(os.environ.get("REGEX_TIMEOUT", "1.0"))
+REGEX_BOOT_TIMEOUT = 15.0
+REGEX_MAX_MATCHES = 50
+
+_compile_regex = functools.lru_cache(maxsize=256)(re.compile)
+
+
+def _regex_worker(conn):
+    """Worker loop: compile (cached) and run patterns sent over the pipe."""
+    conn.send("ready")
+    while True:
+        try:
+            pattern, text = conn.recv()
+        except EOFError:
+            return
+        try:
+            compiled = _compile_regex(pattern)
+        except re.error as e:
+            conn.send({"error": str(e)})
+            continue
+        matches, count = [], 0
+        for m in compiled.finditer(text):
+            count += 1
+            if count <= REGEX_MAX_MATCHES:
+                matches.append({
+                    "match": m.group(0),
+                    "start": m.start(),
+                    "end": m.end(),
+                    "groups": list(m.groups()),
+                    "named": m.groupdict(),
+                })
+        conn.send({"matches": matches, "count": count, "groups": compiled.groups})
+
+
+class RegexTimeout(Exception):
+    pass
+
+
+class RegexBusy(Exception):
+    pass
+
+
+class RegexUnavailable(Exception):
+    pass
+
+
+class RegexSandbox:
+    """Fixed-size pool of regex worker processes, started on first use."""
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self.killed = 0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue = queue.Queue()
+        self._procs: set = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _spawn(self):
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_regex_worker, args=(child,), daemon=True)
+        proc.start()
+        child.close()
+        with self._lock:
+            self._procs.add(proc)
+        # [process, connection, ready]; readiness is confirmed on first checkout
+        self._idle.put([proc, parent, False])
+
+    def _kill(self, worker):
+        proc, conn, _ = worker
+        proc.kill()
+        proc.join()
+        conn.close()
+        with self._lock:
+            self._procs.discard(proc)
+
+    def run(self, pattern: str, text: str) -> dict:
+        with self._lock:
+            start = not self._started
+            self._started = True
+        if start:
+            for _ in range(self.workers):
+                self._spawn()
+
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RegexBusy()
+        proc, conn, ready = worker
+        try:
+            # Interpreter start-up doesn't count against the match timeout.
+            if not ready and conn.poll(REGEX_BOOT_TIMEOUT) and conn.recv() == "ready":
+                worker[2] = True
+            if worker[2]:
+                conn.send((pattern, text))
+                if conn.poll(self.timeout):
+                    result = conn.recv()
+                    self._idle.put(worker)
+                    return result
+        except (EOFError, OSError):
+            pass
+
+        self._kill(worker)
+        self._spawn()
+        if not worker[2]:
+            # It died or hung before it was ready; the pattern never ran.
+            raise RegexUnavailable()
+        self.killed += 1
+        raise RegexTimeout()
+
+    def shutdown(self):
+        with self._lock:
+            procs = list(self._procs)
+            self._procs.clear()
+        for proc in procs:
+            proc.kill()
+
+
+regex_sandbox = RegexSandbox(REGEX_WORKERS, REGEX_TIMEOUT)
+
+
+def _regex_test(pattern: str, text: str) -> dict:
+    try:
+        _compile_regex(pattern)
     except re.error as e:
         return {
             "pattern": pattern,
@@ -360,37 +3003,371 @@ def regex_test(pattern: str, text: str):
             "error": str(e),
         }
 
+    try:
+        result = regex_sandbox.run(pattern, text)
+    except RegexBusy:
+        raise HTTPException(status_code=503, detail="Regex workers are busy", headers={"Retry-After": "1"})
+    except RegexUnavailable:
+        log.error("Regex worker failed to start")
+        raise HTTPException(status_code=503, detail="Regex worker failed to start", headers={"Retry-After": "1"})
+    except RegexTimeout:
+        return {
+            "pattern": pattern,
+            "matches": [],
+            "count": 0,
+            "valid_pattern": True,
+            "timed_out": True,
+            "error": f"Evaluation exceeded {REGEX_TIMEOUT:g}s and was aborted",
+        }
+    if "error" in result:
+        return {"pattern": pattern, "matches": [], "count": 0, "valid_pattern": False, "error": result["error"]}
+
+    # `matches` keeps re.findall's shape; `spans` carries the full detail.
+    groups = result["groups"]
+    return {
+        "pattern": pattern,
+        "matches": [
+            m["match"] if groups == 0 else m["groups"][0] if groups == 1 else m["groups"]
+            for m in result["matches"]
+        ],
+        "spans": result["matches"],
+        "count": result["count"],
+        "valid_pattern": True,
+    }
+
+
+@app.post("/api/v1/playground/regex-test", tags=["Playground"])
+async def regex_test(pattern: str = Query(..., max_length=1000), text: str = Query(..., max_length=10000)):
+    """
+    Test a regex pattern against text and return matches with spans and groups.
+    Evaluation is sandboxed in a worker process and aborted after REGEX_TIMEOUT seconds.
+    """
+    return await blocking_executor.run(_regex_test, pattern, text)
 
 
 # ─────────────────────────── CONTACT FORM ────────────────────────────
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contact_messages.db")
+DB_PATH = os.environ.get(
+    "DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "contact_messages.db")
+)
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Applied to every connection. WAL lets readers run alongside the writer and
+# synchronous=NORMAL only fsyncs at checkpoints, which is safe under WAL.
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # 8 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+DB_WRITE_RETRIES = 5
+
+# One long-lived connection per db_executor thread; each keeps its own
+# prepared-statement cache, so repeated queries skip re-parsing.
+_db_local = threading.local()
+_db_connections: list[sqlite3.Connection] = []
+_db_connections_lock = threading.Lock()
+
+
+def _db() -> sqlite3.Connection:
+    """Return this thread's tuned connection to the contact database."""
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        _db_local.conn = conn
+        with _db_connections_lock:
+            _db_connections.append(conn)
+    return conn
+
+
+def _close_db_connections():
+    with _db_connections_lock:
+        for conn in _db_connections:
+            conn.close()
+        _db_connections.clear()
+
+
+class AsyncDB:
+    """
+    Awaitable access to the contact database. Every statement runs on
+    db_executor, so handlers never block the event loop on SQLite and the
+    number of open connections is bounded by DB_THREADS.
+    """
+
+    @staticmethod
+    def _fetchall(sql: str, params: tuple) -> list[dict]:
+        return [dict(row) for row in _db().execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _executemany(sql: str, rows: list[tuple]):
+        # Take the write lock up front: a deferred transaction that upgrades
+        # mid-way can fail with SQLITE_BUSY without waiting on busy_timeout
+        # when another worker is writing. Retry a few times with jitter
+        # rather than hold a db thread for the full timeout.
+        conn = _db()
+        for attempt in range(DB_WRITE_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError:
+                if attempt == DB_WRITE_RETRIES - 1:
+                    raise
+                time.sleep(random.uniform(0.01, 0.05) * (attempt + 1))
+        with conn:
+            conn.executemany(sql, rows)
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list[dict]:
+        return await db_executor.run(self._fetchall, sql, params)
+
+    async def executemany(self, sql: str, rows: list[tuple]):
+        await db_executor.run(self._executemany, sql, rows)
+
+    async def call(self, fn, *args):
+        """Run a blocking function that uses _db() on a database thread."""
+        return await db_executor.run(fn, *args)
+
+    def iterate(self, rows: Iterator) -> AsyncIterator:
+        """Drive a blocking row generator (e.g. a streamed export) from the database threads."""
+        return db_executor.iterate(rows)
+
+
+contact_db = AsyncDB()
+
+
+# Full-text index over name/email/message. It is an external-content FTS5
+# table, so it stores only the index, and triggers keep it in sync with
+# messages.
+CONTACT_FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE messages_fts USING fts5(
+        name, email, message, content='messages', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, name, email, message) VALUES (new.id, new.name, new.email, new.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, name, email, message)
+        VALUES ('delete', old.id, old.name, old.email, old.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, name, email, message)
+        VALUES ('delete', old.id, old.name, old.email, old.message);
+        INSERT INTO messages_fts(rowid, name, email, message) VALUES (new.id, new.name, new.email, new.message);
+    END""",
+)
+_fts_enabled = False
+
 
 def _init_contact_db():
     """Initialize SQLite database for contact messages."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            message TEXT NOT NULL,
-            ip_address TEXT,
-            user_agent TEXT,
-            created_at TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    global _fts_enabled
+    conn = _db()
+    # Workers start together; IMMEDIATE serializes them so only one creates
+    # the FTS table and runs the rebuild.
+    conn.execute("BEGIN IMMEDIATE")
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                message TEXT NOT NULL,
+                ip_address TEXT,
+                user_agent TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at)")
+
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+    ).fetchone()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            has_fts = has_fts or conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+            ).fetchone()
+            if not has_fts:
+                conn.execute(CONTACT_FTS_SCHEMA[0])
+                # Index rows stored before the FTS table existed.
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+            for statement in CONTACT_FTS_SCHEMA[1:]:
+                conn.execute(statement)
+        _fts_enabled = True
+    except sqlite3.OperationalError as e:
+        log.warning("SQLite FTS5 unavailable, message search disabled: %s", e)
+
+    _message_count.refresh()
+
+
+class _MessageCount:
+    """
+    Row count of the messages table, kept in the shared state so every worker
+    sees the others' inserts. Writers adjust it and it is re-read with
+    COUNT(*) at most every `max_age` seconds instead of on every page request.
+    """
+
+    def __init__(self, max_age: float = 300.0):
+        self.max_age = max_age
+
+    def refresh(self):
+        shared_state.set_message_count(_db().execute("SELECT COUNT(*) FROM messages").fetchone()[0])
+
+    def add(self, n: int):
+        shared_state.add_messages(n)
+
+    @property
+    def stale(self) -> bool:
+        count, read_at = shared_state.message_count()
+        return count < 0 or time.time() - read_at > self.max_age
+
+    async def get(self) -> int:
+        if self.stale:
+            await contact_db.call(self.refresh)
+        return shared_state.message_count()[0]
+
+
+_message_count = _MessageCount()
+
+
+# ── Write-behind ingestion ──
+# Submissions are acknowledged as soon as they are queued. A single writer
+# task group-commits them, flushing when CONTACT_BATCH_SIZE rows are waiting
+# or CONTACT_FLUSH_DEADLINE seconds after the first one arrived. A batch
+# SQLite keeps refusing is retried with backoff and then appended to a spill
+# file, which the writer replays once inserts succeed again, so an
+# acknowledged message is never dropped.
 
-_init_contact_db()
+CONTACT_QUEUE_SIZE = int(os.environ.get("CONTACT_QUEUE_SIZE", "1000"))
+CONTACT_BATCH_SIZE = 64
+CONTACT_FLUSH_DEADLINE = 0.05
+CONTACT_DRAIN_TIMEOUT = 10.0
+CONTACT_WRITE_RETRIES = 5
+CONTACT_RETRY_BACKOFF = 0.1  # doubles per attempt: 1.5 s of waiting in total
+CONTACT_SPILL_PATH = os.environ.get("CONTACT_SPILL_PATH", DB_PATH + "-pending.ndjson")
+_contact_queue: asyncio.Queue | None = None
+
+
+CONTACT_INSERT_SQL = (
+    "INSERT INTO messages (name, email, message, ip_address, user_agent, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def _spill_contacts(rows: list[tuple]):
+    with open(CONTACT_SPILL_PATH, "ab") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(b"".join(orjson.dumps(row) + b"\n" for row in rows))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _has_spilled_contacts() -> bool:
+    try:
+        return os.stat(CONTACT_SPILL_PATH).st_size > 0
+    except FileNotFoundError:
+        return False
+
+
+def _replay_spilled_contacts() -> list[tuple]:
+    """Insert every spilled row and empty the file; runs on a database thread."""
+    with open(CONTACT_SPILL_PATH, "r+b") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)  # other workers append and replay too
+        rows = []
+        for line in f:
+            try:
+                rows.append(tuple(orjson.loads(line)))
+            except orjson.JSONDecodeError:
+                log.warning("Skipping a torn line in %s", CONTACT_SPILL_PATH)
+        if rows:
+            AsyncDB._executemany(CONTACT_INSERT_SQL, rows)
+        f.truncate(0)
+    return rows
+
+
+async def _contacts_stored(rows: list[tuple]):
+    _message_count.add(len(rows))
+    await nlp_executor.run(_observe_texts, [row[2] for row in rows])
+
+
+async def _insert_contacts(rows: list[tuple]):
+    """Store a batch, retrying with backoff; spill it to disk if SQLite keeps refusing."""
+    for attempt in range(CONTACT_WRITE_RETRIES):
+        try:
+            await contact_db.executemany(CONTACT_INSERT_SQL, rows)
+            break
+        except sqlite3.Error as e:
+            log.warning("Storing %d contact message(s) failed (attempt %d): %s", len(rows), attempt + 1, e)
+        if attempt == CONTACT_WRITE_RETRIES - 1:
+            log.error("Spilling %d contact message(s) to %s", len(rows), CONTACT_SPILL_PATH)
+            await blocking_executor.run(_spill_contacts, rows)
+            return
+        try:
+            await asyncio.sleep(CONTACT_RETRY_BACKOFF * 2 ** attempt)
+        except asyncio.CancelledError:
+            _spill_contacts(rows)  # shutting down mid-backoff
+            raise
+    await _contacts_stored(rows)
+    await _replay_contacts()
+
+
+async def _replay_contacts():
+    if not _has_spilled_contacts():
+        return
+    try:
+        replayed = await contact_db.call(_replay_spilled_contacts)
+    except sqlite3.Error as e:
+        log.warning("Replaying spilled contact messages failed: %s", e)
+        return
+    if replayed:
+        log.info("Stored %d spilled contact message(s)", len(replayed))
+        await _contacts_stored(replayed)
+
+
+async def _contact_writer(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    await _replay_contacts()  # left over from a previous run
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + CONTACT_FLUSH_DEADLINE
+        while len(batch) < CONTACT_BATCH_SIZE:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await _insert_contacts(batch)
+        except Exception:
+            log.exception("Failed to store %d contact message(s)", len(batch))
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def _drain_contact_queue():
+    if _contact_queue is None:
+        return
+    try:
+        await asyncio.wait_for(_contact_queue.join(), CONTACT_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        log.error("Contact queue drain timed out with %d message(s) pending", _contact_queue.qsize())
 
 
 @app.post("/api/v1/contact", tags=["Contact"])
-def submit_contact(input: ContactInput, request: Request):
-    """Receive a contact form submission and store it in SQLite."""
+async def submit_contact(input: ContactInput, request: Request):
+    """Receive a contact form submission and queue it for storage in SQLite."""
     # Basic email format validation
-    import re as _re
-    if not _re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", input.email):
+    if not EMAIL_RE.match(input.email):
         raise HTTPException(status_code=400, detail="Invalid email format")
 
     now = datetime.now(timezone.utc).isoformat()
@@ -398,64 +3375,210 @@ def submit_contact(input: ContactInput, request: Request):
     user_agent = request.headers.get("user-agent", "unknown")
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute(
-            "INSERT INTO messages (name, email, message, ip_address, user_agent, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (input.name, input.email, input.message, client_ip, user_agent, now),
+        _contact_queue.put_nowait((input.name, input.email, input.message, client_ip, user_agent, now))
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many submissions right now, please retry shortly",
+            headers={"Retry-After": "5"},
         )
-        conn.commit()
-        msg_count = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
-        conn.close()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save message: {str(e)}")
 
     return {
         "success": True,
         "message": "Thank you! Your message has been received.",
         "timestamp": now,
-        "ref": msg_count,
+        "queued": True,
     }
 
 
 @app.get("/api/v1/contact/messages", tags=["Contact"])
-def list_messages(limit: int = 50, offset: int = 0):
-    """List stored contact messages (admin endpoint)."""
+async def list_messages(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: int | None = Query(None, ge=1, description="Return messages older than this id (from next_cursor)"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+):
+    """
+    List stored contact messages, newest first (admin endpoint).
+    Pages by id via `cursor`; `total` is a cached count, not re-counted per call.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(
-            "SELECT * FROM messages ORDER BY id DESC LIMIT ? OFFSET ?",
-            (min(limit, 100), offset),
-        ).fetchall()
-        total = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
-        conn.close()
-        return {
-            "messages": [dict(row) for row in rows],
-            "total": total,
+        if cursor is not None:
+            rows = await contact_db.fetchall(
+                "SELECT * FROM messages WHERE id < ? ORDER BY id DESC LIMIT ?", (cursor, limit)
+            )
+        else:
+            rows = await contact_db.fetchall(
+                "SELECT * FROM messages ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
+            )
+        return FastJSONResponse({
+            "messages": rows,
+            "total": await _message_count.get(),
             "limit": limit,
             "offset": offset,
-        }
+            "next_cursor": rows[-1]["id"] if len(rows) == limit else None,
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+EXPORT_COLUMNS = ("id", "name", "email", "message", "ip_address", "user_agent", "created_at")
+EXPORT_BATCH_ROWS = 2000
+
+
+def _parse_iso_bound(value: str | None, name: str) -> str | None:
+    """
+    Normalise a bound to the stored created_at form (UTC isoformat) so the
+    SQL string comparison orders correctly; naive values are taken as UTC.
+    """
+    if value is None:
+        return None
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO-8601 date or datetime")
+    if bound.tzinfo is None:
+        bound = bound.replace(tzinfo=timezone.utc)
+    return bound.astimezone(timezone.utc).isoformat()
+
+
+def _export_rows(since: str | None, until: str | None, fmt: str, compress: bool) -> Iterator[bytes]:
+    """
+    Yield the export in fetchmany-sized batches from a dedicated read
+    connection; only one batch is in memory at a time.
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    try:
+        clauses, params = [], []
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Both orderings are satisfied by an index, so SQLite never sorts in memory.
+        order = "created_at, id" if clauses else "id"
+        cursor = conn.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM messages {where} ORDER BY {order}", params)
+
+        if fmt == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+        while rows := cursor.fetchmany(EXPORT_BATCH_ROWS):
+            if fmt == "csv":
+                writer.writerows(rows)
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = b"".join(
+                    orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows
+                ).decode()
+            out = emit(chunk)
+            if out:
+                yield out
+        if buffer.tell():  # header of an empty CSV export
+            yield emit(buffer.getvalue())
+        if compressor:
+            yield compressor.flush()
+    finally:
+        conn.close()
+
+
+@app.get("/api/v1/contact/messages/export", tags=["Contact"])
+async def export_messages(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    since: str | None = Query(None, description="Inclusive ISO-8601 lower bound on created_at"),
+    until: str | None = Query(None, description="Exclusive ISO-8601 upper bound on created_at"),
+    gzip: bool = False,
+):
+    """Stream every stored message (or a created_at range) as CSV or NDJSON, optionally gzipped. Local callers only."""
+    _require_local_caller(request)
+    since = _parse_iso_bound(since, "since")
+    until = _parse_iso_bound(until, "until")
+
+    filename = f"contact_messages.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        contact_db.iterate(_export_rows(since, until, format, gzip)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _fts_query(q: str) -> str:
+    """Quote each term so user input can't inject FTS5 syntax; the last term matches as a prefix."""
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+@app.get("/api/v1/contact/messages/search", tags=["Contact"])
+async def search_messages(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Full-text search over message name, email and body, best matches first. Local callers only."""
+    _require_local_caller(request)
+    if not _fts_enabled:
+        raise HTTPException(status_code=503, detail="Search is unavailable on this server")
+
+    match = _fts_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Empty search query")
+
+    try:
+        rows = await contact_db.fetchall(
+            """
+            SELECT m.*, snippet(messages_fts, 2, '[', ']', '…', 12) AS snippet
+            FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+            WHERE messages_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, limit),
+        )
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+
+    return {"query": q, "messages": rows, "count": len(rows)}
+
+
 # ─────────────────────────── Root ───────────────────────────
 
+ROOT_INFO = {
+    "name": "Manpreet Singh — Portfolio API",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "endpoints": {
+        "system": "/api/v1/system/metrics",
+        "ai": ["/api/v1/ai/sentiment", "/api/v1/ai/keywords", "/api/v1/ai/summarize"],
+        "playground": [
+            "/api/v1/playground/hash",
+            "/api/v1/playground/base64",
+            "/api/v1/playground/headers",
+            "/api/v1/playground/ip",
+            "/api/v1/playground/json-to-csv",
+        ],
+    },
+}
+# Static for the life of the process: render and tag it once.
+_ROOT_BODY = orjson.dumps(ROOT_INFO)
+_ROOT_ETAG = f'"{hashlib.blake2b(_ROOT_BODY, digest_size=8).hexdigest()}"'
+
+
 @app.get("/", tags=["Root"])
-def root():
-    return {
-        "name": "Manpreet Singh — Portfolio API",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "endpoints": {
-            "system": "/api/v1/system/metrics",
-            "ai": ["/api/v1/ai/sentiment", "/api/v1/ai/keywords", "/api/v1/ai/summarize"],
-            "playground": [
-                "/api/v1/playground/hash",
-                "/api/v1/playground/base64",
-                "/api/v1/playground/headers",
-                "/api/v1/playground/ip",
-                "/api/v1/playground/json-to-csv",
-            ],
-        },
-    }
+async def root(request: Request):
+    headers = {"ETag": _ROOT_ETAG, "Cache-Control": "public, max-age=3600"}
+    if _etag_matches(request, _ROOT_ETAG):
+        return Response(status_code=304, headers=headers)
+    return Response(_ROOT_BODY, media_type="application/json", headers=headers)
@@ -20,6 +20,7 @@ import os
 import subprocess
 import sys
 import time
+from contextlib import contextmanager
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from datetime import datetime, timezone
 
@@ -31,6 +32,16 @@ REPO_URL = "https://github.com/manpreetsingh78/portfolio-source-code.git"
 BRANCH = "main"
 LOG_FILE = "/var/log/portfolio-deploy.log"
 
+# ── Deploy metrics (served at /webhook/metrics in Prometheus text format) ──
+DEPLOY_STATS = {
+    "success": 0,
+    "failed": 0,
+    "last_finished": 0.0,
+    "last_success": 0,
+    "last_duration": 0.0,
+    "steps": {},  # step -> seconds, for the most recent deploy
+}
+
 
 def log(msg: str):
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -43,6 +54,42 @@ def log(msg: str):
         pass
 
 
+@contextmanager
+def step(name: str, message: str):
+    """Log a deploy step and record how long it took."""
+    log(message)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        DEPLOY_STATS["steps"][name] = elapsed
+        log(f"    {name} took {elapsed:.2f}s")
+
+
+def render_metrics() -> str:
+    lines = [
+        "# HELP deploy_runs_total Deploys by outcome.",
+        "# TYPE deploy_runs_total counter",
+        f'deploy_runs_total{{result="success"}} {DEPLOY_STATS["success"]}',
+        f'deploy_runs_total{{result="failed"}} {DEPLOY_STATS["failed"]}',
+        "# HELP deploy_last_success Whether the most recent deploy succeeded.",
+        "# TYPE deploy_last_success gauge",
+        f'deploy_last_success {DEPLOY_STATS["last_success"]}',
+        "# HELP deploy_last_finished_timestamp_seconds Unix time the most recent deploy finished.",
+        "# TYPE deploy_last_finished_timestamp_seconds gauge",
+        f'deploy_last_finished_timestamp_seconds {DEPLOY_STATS["last_finished"]:.0f}',
+        "# HELP deploy_last_duration_seconds Wall time of the most recent deploy.",
+        "# TYPE deploy_last_duration_seconds gauge",
+        f'deploy_last_duration_seconds {DEPLOY_STATS["last_duration"]:.3f}',
+        "# HELP deploy_step_duration_seconds Step durations of the most recent deploy.",
+        "# TYPE deploy_step_duration_seconds gauge",
+    ]
+    for name, seconds in DEPLOY_STATS["steps"].items():
+        lines.append(f'deploy_step_duration_seconds{{step="{name}"}} {seconds:.3f}')
+    return "\n".join(lines) + "\n"
+
+
 def verify_signature(payload: bytes, signature: str) -> bool:
     """Verify GitHub HMAC-SHA256 webhook signature."""
     if not WEBHOOK_SECRET:
@@ -73,59 +120,60 @@ def deploy() -> tuple[bool, str]:
 
     try:
         # 1. Clone latest
-        log("==> Cloning latest code...")
-        run_cmd(f"rm -rf {deploy_dir}")
-        rc, out = run_cmd(f"git clone --depth 1 --branch {BRANCH} {REPO_URL} {deploy_dir}")
+        with step("clone", "==> Cloning latest code..."):
+            run_cmd(f"rm -rf {deploy_dir}")
+            rc, out = run_cmd(f"git clone --depth 1 --branch {BRANCH} {REPO_URL} {deploy_dir}")
         if rc != 0:
             return False, f"Git clone failed: {out}"
         steps.append("cloned")
 
         # 2. Backup current
-        log("==> Backing up current code...")
-        run_cmd(f"cp {APP_DIR}/main.py {APP_DIR}/main.py.bak")
+        with step("backup", "==> Backing up current code..."):
+            run_cmd(f"cp {APP_DIR}/main.py {APP_DIR}/main.py.bak")
         steps.append("backed up")
 
         # 3. Copy new files
-        log("==> Copying new files...")
-        rc, out = run_cmd(f"cp {deploy_dir}/backend/api/main.py {APP_DIR}/main.py")
+        with step("copy", "==> Copying new files..."):
+            rc, out = run_cmd(f"cp {deploy_dir}/backend/api/main.py {APP_DIR}/main.py")
+            if rc == 0:
+                run_cmd(f"cp {deploy_dir}/backend/api/requirements.txt {APP_DIR}/requirements.txt")
         if rc != 0:
             return False, f"Copy main.py failed: {out}"
-        run_cmd(f"cp {deploy_dir}/backend/api/requirements.txt {APP_DIR}/requirements.txt")
         steps.append("copied")
 
         # 4. Install deps
-        log("==> Installing dependencies...")
-        rc, out = run_cmd(
-            f"{APP_DIR}/venv/bin/pip install -q -r {APP_DIR}/requirements.txt",
-            cwd=APP_DIR
-        )
+        with step("install", "==> Installing dependencies..."):
+            rc, out = run_cmd(
+                f"{APP_DIR}/venv/bin/pip install -q -r {APP_DIR}/requirements.txt",
+                cwd=APP_DIR
+            )
         if rc != 0:
             log(f"pip install warning: {out}")
         steps.append("deps installed")
 
         # 5. Restart
-        log("==> Restarting service...")
-        rc, out = run_cmd("systemctl restart portfolio-api")
+        with step("restart", "==> Restarting service..."):
+            rc, out = run_cmd("systemctl restart portfolio-api")
         if rc != 0:
             return False, f"Restart failed: {out}"
         steps.append("restarted")
 
         # 6. Health check with retries
-        log("==> Running health check...")
         health_ok = False
-        for attempt in range(5):
-            time.sleep(3)
-            rc, out = run_cmd("curl -s -o /dev/null -w '%{http_code}' http://localhost:8000/api/v1/system/health")
-            code = out.strip().strip("'")
-            if code == "200":
-                health_ok = True
-                break
-            log(f"    Health check attempt {attempt + 1}/5: HTTP {code}")
+        with step("health_check", "==> Running health check..."):
+            for attempt in range(5):
+                time.sleep(3)
+                rc, out = run_cmd("curl -s -o /dev/null -w '%{http_code}' http://localhost:8000/api/v1/system/health")
+                code = out.strip().strip("'")
+                if code == "200":
+                    health_ok = True
+                    break
+                log(f"    Health check attempt {attempt + 1}/5: HTTP {code}")
         if not health_ok:
             # Rollback
-            log(f"==> Health check failed after 5 attempts, rolling back...")
-            run_cmd(f"cp {APP_DIR}/main.py.bak {APP_DIR}/main.py")
-            run_cmd("systemctl restart portfolio-api")
+            with step("rollback", "==> Health check failed after 5 attempts, rolling back..."):
+                run_cmd(f"cp {APP_DIR}/main.py.bak {APP_DIR}/main.py")
+                run_cmd("systemctl restart portfolio-api")
             return False, f"Health check failed (HTTP {code}), rolled back"
         steps.append("health OK")
 
@@ -211,8 +259,14 @@ class WebhookHandler(BaseHTTPRequestHandler):
 
         # Deploy!
         log(f"==> Deploying from push by {data.get('pusher', {}).get('name', 'unknown')}...")
+        DEPLOY_STATS["steps"] = {}
+        started = time.perf_counter()
         success, message = deploy()
-        log(message)
+        DEPLOY_STATS["last_duration"] = time.perf_counter() - started
+        DEPLOY_STATS["last_finished"] = time.time()
+        DEPLOY_STATS["last_success"] = int(success)
+        DEPLOY_STATS["success" if success else "failed"] += 1
+        log(f"{message} ({DEPLOY_STATS['last_duration']:.1f}s)")
 
         status = 200 if success else 500
         self.send_response(status)
@@ -229,6 +283,11 @@ class WebhookHandler(BaseHTTPRequestHandler):
             self.send_header("Content-Type", "application/json")
             self.end_headers()
             self.wfile.write(b'{"status":"healthy","service":"deploy-webhook"}')
+        elif self.path == "/webhook/metrics":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(render_metrics().encode())
         else:
             self.send_response(404)
             self.end_headers()
@@ -246,6 +305,7 @@ def main():
     log(f"Webhook listener started on port {WEBHOOK_PORT}")
     log(f"Endpoint: POST /webhook")
     log(f"Health:   GET  /webhook/health")
+    log(f"Metrics:  GET  /webhook/metrics")
     try:
         server.serve_forever()
     except KeyboardInterrupt:
@@ -162,8 +162,35 @@ export default function LiveInfra() {
 
   useEffect(() => {
     fetchMetrics();
-    const interval = setInterval(fetchMetrics, 10000); // refresh every 10s
-    return () => clearInterval(interval);
+
+    // Prefer the SSE push stream; fall back to polling every 10s if it fails.
+    let interval: ReturnType<typeof setInterval> | null = null;
+    const startPolling = () => {
+      if (!interval) interval = setInterval(fetchMetrics, 10000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return () => {
+        if (interval) clearInterval(interval);
+      };
+    }
+
+    const source = new EventSource(`${VM_API}/api/v1/system/metrics/stream`);
+    source.addEventListener('metrics', (event) => {
+      setMetrics(JSON.parse((event as MessageEvent).data));
+      setError(false);
+      setLoading(false);
+      setLastFetch(new Date());
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+
+    return () => {
+      source.close();
+      if (interval) clearInterval(interval);
+    };
   }, [fetchMetrics]);
 
   return (